@@ -10,8 +10,11 @@ For more information, please see:
 # IMPORTS
 # =============================================================================
 
+# Standard Library Imports
+import logging
+
 # Houdini Toolbox Imports
-from ht.pyfilter.logger import logger
+from ht.pyfilter.logger import flushLogs, logger
 from ht.pyfilter.manager import PyFilterManager
 
 # Houdini Imports
@@ -44,10 +47,6 @@ def filterCamera():
 
     PYFILTER_MANAGER.runFilters("filterCamera")
 
-def filterEndRender():
-    """Perform actions just after the image has been rendered."""
-    logging.info("filterEndRender")
-
 def filterCameraSegment():
     """Modify properties for a camera motion segment.
 
@@ -66,6 +65,12 @@ def filterEndRender():
 
     PYFILTER_MANAGER.runFilters("filterEndRender")
 
+    # Output any filter timing information.
+    PYFILTER_MANAGER.writeProfile()
+
+    # Make sure everything about the render has been logged.
+    flushLogs()
+
 
 def filterError(level, message, prefix=""):
     """Process information, warning or error messages printed by Mantra.
@@ -87,7 +92,10 @@ def filterFog():
     a fog object. The function can query fog: settings and possibly alter them.
 
     """
-    logger.debug("filterFog ({})".format(mantra.property("object:name")[0]))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "filterFog ({})".format(mantra.property("object:name")[0])
+        )
 
     PYFILTER_MANAGER.runFilters("filterFog")
 
@@ -113,7 +121,11 @@ def filterInstance():
     alter them.
 
     """
-    logger.debug("filterInstance ({})".format(mantra.property("object:name")[0]))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "filterInstance ({})".format(mantra.property("object:name")[0])
+        )
+
     PYFILTER_MANAGER.runFilters("filterInstance")
 
 
@@ -125,7 +137,10 @@ def filterLight():
     them.
 
     """
-    logger.debug("filterLight ({})".format(mantra.property("object:name")[0]))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "filterLight ({})".format(mantra.property("object:name")[0])
+        )
 
     PYFILTER_MANAGER.runFilters("filterLight")
 
@@ -157,13 +172,14 @@ def filterOutputAssets(assets):
 
 def filterPlane():
     """Change query and modify image plane properties."""
-    variable = mantra.property("plane:variable")[0]
-    channel = mantra.property("plane:channel")[0]
+    if logger.isEnabledFor(logging.DEBUG):
+        variable = mantra.property("plane:variable")[0]
+        channel = mantra.property("plane:channel")[0]
 
-    if variable == channel or channel == "":
-        logger.debug("filterPlane ({})".format(variable))
-    else:
-        logger.debug("filterPlane ({} -> {})".format(variable, channel))
+        if variable == channel or channel == "":
+            logger.debug("filterPlane ({})".format(variable))
+        else:
+            logger.debug("filterPlane ({} -> {})".format(variable, channel))
 
     PYFILTER_MANAGER.runFilters("filterPlane")
 
@@ -174,6 +190,8 @@ def filterQuit():
 
     PYFILTER_MANAGER.runFilters("filterQuit")
 
+    flushLogs()
+
 
 def filterRender():
     """Query render related properties.
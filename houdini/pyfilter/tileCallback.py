@@ -0,0 +1,18 @@
+"""This script is run by Mantra after each tile is rendered to record tile
+render statistics.
+
+It is set as the tile callback by the SetTileCallback PyFilter operation when
+the -tilelog arg is passed.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Houdini Toolbox Imports
+from ht.pyfilter.tiles import recordTile
+
+# =============================================================================
+
+recordTile()
@@ -19,16 +19,65 @@ import hou
 class PointCloud(object):
     """A wrapper around scipy.spatial.KDTree to represent point positions.
 
+    The cloud can be updated incrementally through update().  Changed and
+    inserted points are held in a small secondary buffer that is searched by
+    brute force while their old tree entries are masked out.  Once the number
+    of pending changes exceeds rebuild_threshold (a fraction of the number of
+    points in the cloud) the tree is fully rebuilt.
+
+    If compact is True then positions are stored as 32 bit floats and point
+    numbers as 32 bit ints, and data is read from the geometry without
+    creating intermediate Python lists.  This greatly reduces the memory
+    required for large clouds at the cost of some position precision.
+
     """
 
-    def __init__(self, geometry, pattern=None, leaf_size=10):
+    def __init__(self, geometry, pattern=None, leaf_size=10,
+                 rebuild_threshold=0.1, compact=False):
         # The source geometry. We need this to be able to glob points.
         self._geometry = geometry
 
+        self._leaf_size = leaf_size
+        self._rebuild_threshold = rebuild_threshold
+
+        self._compact = compact
+
+        # The types used to store positions and point numbers.
+        if compact:
+            self._float_type = numpy.float32
+            self._int_type = numpy.int32
+
+        else:
+            self._float_type = numpy.float64
+            self._int_type = numpy.int64
+
         # Don't create a point map by default.
         self._point_map = None
 
-        if pattern:
+        # The order of the point map entries when sorted by point number, used
+        # to look up tree indexes from point numbers. Only built when required
+        # by an update.
+        self._point_index = None
+
+        # Incremental update state: a mask of tree entries which are no longer
+        # valid and a buffer of point number -> position entries which are not
+        # in the tree.
+        self._stale = None
+        self._num_stale = 0
+        self._buffer = {}
+        self._buffer_arrays = None
+
+        # The number of entries a mask needs to cover every point number in
+        # the cloud.  Computed on demand and reset when points change.
+        self._mask_size = None
+
+        # Attribute values read from the geometry, keyed by attribute name.
+        self._attrib_values = {}
+
+        if compact:
+            data = self._readCompactData(pattern)
+
+        elif pattern:
             # Get a list of the points we want to build the tree from.
             group_points = geometry.globPoints(pattern)
 
@@ -39,12 +88,14 @@ class PointCloud(object):
             # when returning results from queries, it only returns the index
             # numbers. We then use those indexes to get the real point number
             # from the point map.
-            self._point_map = [point.number() for point in group_points]
+            self._point_map = numpy.array(
+                [point.number() for point in group_points],
+                dtype=self._int_type
+            )
 
             # Build our data array. Since it was created from a list of
             # hou.Vector3's (tuples) we don't need to reshape.
             data = numpy.array(positions)
-            self._num_elements = len(group_points)
 
         else:
             # Get the point positions as a giant list.
@@ -54,7 +105,9 @@ class PointCloud(object):
             # represent 3 component entries.
             num_points = len(geometry.iterPoints())
             data = numpy.array(positions).reshape((num_points, 3))
-            self._num_elements = num_points
+
+        # Release the source positions before building the tree.
+        positions = None
 
         # Build the tree from the data.
         self._tree = KDTree(data, leaf_size)
@@ -70,22 +123,94 @@ class PointCloud(object):
     # NON-PUBLIC METHODS
     # =========================================================================
 
-    def _getResultPoints(self, indexes):
-        """This method converts a list of integers into corresponding hou.Point
-        objects belonging to the geometry depending on whether a point map is
-        being used.
+    def _checkMask(self, mask):
+        """Convert a mask to a boolean array, making sure it has an entry for
+        every point number in the cloud.
 
         """
-        # If we have a point map set up we need to index into that and then
-        # convert to string.
-        if self._point_map:
-            pattern = " ".join(
-                [str(self._point_map[index]) for index in indexes]
+        mask = numpy.asarray(mask, dtype=bool)
+
+        size = self._getMaskSize()
+
+        if len(mask) < size:
+            raise ValueError(
+                "Mask has {} entries but the cloud contains {} point "
+                "numbers".format(len(mask), size)
             )
 
-        # Just convert the indexes to strings.
-        else:
-            pattern = " ".join([str(index) for index in indexes])
+        return mask
+
+    def _getAttributeValues(self, name):
+        """Get the values of a point attribute as an array indexed by point
+        number.
+
+        """
+        # Read the values from the geometry the first time they are used.
+        if name not in self._attrib_values:
+            attrib = self._geometry.findPointAttrib(name)
+
+            if attrib is None:
+                raise ValueError("Invalid point attribute: {}".format(name))
+
+            data_type = attrib.dataType()
+
+            # Read numeric data in binary form to avoid creating lists.
+            if self.compact and data_type == hou.attribData.Float:
+                values = numpy.frombuffer(
+                    self._geometry.pointFloatAttribValuesAsString(name),
+                    dtype=numpy.float32
+                )
+
+            elif self.compact and data_type == hou.attribData.Int:
+                values = numpy.frombuffer(
+                    self._geometry.pointIntAttribValuesAsString(name),
+                    dtype=numpy.int32
+                )
+
+            elif data_type == hou.attribData.Float:
+                values = numpy.array(
+                    self._geometry.pointFloatAttribValues(name)
+                )
+
+            elif data_type == hou.attribData.Int:
+                values = numpy.array(
+                    self._geometry.pointIntAttribValues(name)
+                )
+
+            else:
+                values = numpy.array(
+                    self._geometry.pointStringAttribValues(name),
+                    dtype=object
+                )
+
+            self._attrib_values[name] = values.reshape((-1, attrib.size()))
+
+        return self._attrib_values[name]
+
+    def _getBufferArrays(self):
+        """Get the buffered point numbers and positions as arrays."""
+        # The arrays are cached until the buffer is modified.
+        if self._buffer_arrays is None:
+            numbers = numpy.array(self._buffer.keys(), dtype=self._int_type)
+            positions = numpy.array(
+                self._buffer.values(),
+                dtype=self._float_type
+            ).reshape((len(numbers), 3))
+
+            self._buffer_arrays = (numbers, positions)
+
+        return self._buffer_arrays
+
+    def _getResultPoints(self, numbers):
+        """This method converts a list of point numbers into corresponding
+        hou.Point objects belonging to the geometry.
+
+        """
+        # Nothing to glob.
+        if not len(numbers):
+            return ()
+
+        pattern = " ".join([str(number) for number in numbers])
 
         # Try to return our matched points.
         try:
@@ -96,79 +221,666 @@ class PointCloud(object):
         except hou.OperationFailed:
             return ()
 
-    # =========================================================================
-    # METHODS
-    # =========================================================================
+    def _getTreeIndex(self, number):
+        """Get the tree index for a point number, or None if the point is not
+        in the tree.
+
+        """
+        # Without a point map the indexes are the point numbers.
+        if self._point_map is None:
+            if 0 <= number < self._tree.n:
+                return number
+
+            return None
+
+        # Sort the point map the first time we need to search it.
+        if self._point_index is None:
+            self._point_index = numpy.argsort(
+                self._point_map,
+                kind="mergesort"
+            ).astype(self._int_type)
+
+        position = numpy.searchsorted(
+            self._point_map,
+            number,
+            sorter=self._point_index
+        )
+
+        if position < len(self._point_map):
+            index = self._point_index[position]
+
+            if self._point_map[index] == number:
+                return int(index)
+
+        return None
+
+    def _getLiveData(self):
+        """Get the point numbers and positions of all valid points, whether
+        they are in the tree or the buffer.
+
+        """
+        indexes = numpy.arange(self._tree.n)
+
+        # Remove any stale tree entries.
+        if self._num_stale:
+            indexes = indexes[~self._stale]
+
+        numbers = self._mapIndexes(indexes)
+        data = numpy.asarray(self._tree.data)[indexes]
+
+        # Add in any buffered points.
+        if self._buffer:
+            buffer_numbers, buffer_positions = self._getBufferArrays()
+
+            numbers = numpy.concatenate((numbers, buffer_numbers))
+            data = numpy.concatenate((data, buffer_positions))
+
+        return numbers, data
+
+    def _getMaskSize(self):
+        """Get the number of entries a mask needs to cover every point number
+        in the cloud, including points inserted by updates.
+
+        """
+        if self._mask_size is None:
+            # Without a point map the indexes are the point numbers.
+            if self._point_map is None:
+                size = self._tree.n
+
+            elif len(self._point_map):
+                size = int(self._point_map.max()) + 1
+
+            else:
+                size = 0
+
+            if self._buffer:
+                size = max(size, max(self._buffer) + 1)
+
+            self._mask_size = size
+
+        return self._mask_size
 
-    def findAllClosePoints(self, position, maxdist):
-        """Find all points within the maxdist from the position."""
+    def _mapIndexPairs(self, pairs):
+        """Convert an array of tree index pairs to point numbers."""
+        # If we have a point map set up we need to index into that.
+        if self._point_map is not None:
+            return self._point_map[pairs]
+
+        return pairs
+
+    def _mapIndexes(self, indexes):
+        """Convert a list of tree indexes to point numbers."""
+        # If we have a point map set up we need to index into that.
+        indexes = numpy.asarray(indexes, dtype=self._int_type)
+
+        if self._point_map is not None:
+            return self._point_map[indexes]
+
+        return indexes
+
+    def _markStale(self, number):
+        """Mark the tree entry for a point number as no longer valid."""
+        index = self._getTreeIndex(number)
+
+        # The point isn't in the tree.
+        if index is None:
+            return
+
+        if self._stale is None:
+            self._stale = numpy.zeros(self._tree.n, dtype=bool)
+
+        if not self._stale[index]:
+            self._stale[index] = True
+            self._num_stale += 1
+
+    def _queryBuffer(self, position):
+        """Get the point numbers in the buffer and their distances to the
+        position.
+
+        """
+        numbers, positions = self._getBufferArrays()
+
+        distances = numpy.sqrt(
+            ((positions - numpy.asarray(position)) ** 2).sum(axis=1)
+        )
+
+        return numbers, distances
+
+    def _readCompactData(self, pattern=None):
+        """Read the point positions, and the point map if a pattern is used,
+        directly into compact arrays.
+
+        """
+        # Read all the positions as a binary string of 32 bit floats.
+        data = numpy.frombuffer(
+            self._geometry.pointFloatAttribValuesAsString("P"),
+            dtype=numpy.float32
+        ).reshape((-1, 3))
+
+        if pattern:
+            group_points = self._geometry.globPoints(pattern)
+
+            self._point_map = numpy.fromiter(
+                (point.number() for point in group_points),
+                dtype=self._int_type,
+                count=len(group_points)
+            )
+
+            # Only keep the positions of the points in the group.
+            data = data[self._point_map]
+
+        return data
+
+    def _searchNearest(self, position, num_points, maxdist=None, mask=None):
+        """Find the point numbers and distances of the closest N points to the
+        position, sorted by distance.
+
+        If a mask is passed then points which are not enabled in it are
+        skipped and the search is widened until enough eligible points are
+        found.
+
+        """
         # Convert the position to a compatible ndarray.
         positions = numpy.array([position])
 
+        if mask is not None:
+            mask = self._checkMask(mask)
+
+        # Query for extra points to account for any stale entries that will
+        # be discarded.
+        num_query = num_points + self._num_stale
+
+        while True:
+            num_query = min(num_query, self._tree.n)
+
+            distances = numpy.empty(0)
+            indexes = numpy.empty(0, dtype=int)
+
+            # Query the tree.
+            if num_query > 0:
+                result = self._tree.query(positions, num_query)
+
+                # Single point queries return scalars so ensure we always have
+                # arrays of found distances and indexes.
+                distances = numpy.atleast_1d(result[0][0])
+                indexes = numpy.atleast_1d(result[1][0])
+
+            # The furthest distance searched so far.
+            search_distance = distances[-1] if len(distances) else 0
+
+            # Filter out any stale entries.
+            if self._num_stale:
+                valid = ~self._stale[indexes]
+
+                distances = distances[valid]
+                indexes = indexes[valid]
+
+            numbers = self._mapIndexes(indexes)
+
+            if mask is not None:
+                valid = mask[numbers]
+
+                distances = distances[valid]
+                numbers = numbers[valid]
+
+            # Stop once we have enough points, have searched the whole tree or
+            # any further points will be too far away.
+            if len(numbers) >= num_points or num_query == self._tree.n:
+                break
+
+            if maxdist is not None and search_distance >= maxdist:
+                break
+
+            # Widen the search.
+            num_query *= 2
+
+        # Merge in any buffered points and sort everything by distance.
+        if self._buffer:
+            buffer_numbers, buffer_distances = self._queryBuffer(position)
+
+            if mask is not None:
+                valid = mask[buffer_numbers]
+
+                buffer_distances = buffer_distances[valid]
+                buffer_numbers = buffer_numbers[valid]
+
+            distances = numpy.concatenate((distances, buffer_distances))
+            numbers = numpy.concatenate((numbers, buffer_numbers))
+
+            order = numpy.argsort(distances, kind="mergesort")
+
+            distances = distances[order]
+            numbers = numbers[order]
+
+        distances = distances[:num_points]
+        numbers = numbers[:num_points]
+
+        # If the maxdist is not None then we specified a maximum distance points
+        # can be within.
+        if maxdist is not None:
+            # Filter the list to remove those too far away.
+            valid = distances < maxdist
+
+            distances = distances[valid]
+            numbers = numbers[valid]
+
+        return numbers, distances
+
+    def _searchRadius(self, position, maxdist, mask=None):
+        """Find the point numbers and distances of all points within the
+        maxdist from the position.
+
+        """
+        # Convert the position to a compatible ndarray.
+        positions = numpy.array([position])
+
+        if mask is not None:
+            mask = self._checkMask(mask)
+
         # Perform a query based on the position and maxdist.
-        result = self._tree.query_ball_point(positions, maxdist)
+        indexes = numpy.array(
+            self._tree.query_ball_point(positions, maxdist)[0],
+            dtype=int
+        )
+
+        # Remove any points which have changed since the tree was built.
+        if self._num_stale:
+            indexes = indexes[~self._stale[indexes]]
+
+        numbers = self._mapIndexes(indexes)
+
+        distances = numpy.sqrt(
+            (
+                (numpy.asarray(self._tree.data)[indexes] - positions) ** 2
+            ).sum(axis=1)
+        )
+
+        # Search any points which have changed since the tree was built.
+        if self._buffer:
+            buffer_numbers, buffer_distances = self._queryBuffer(position)
+
+            valid = buffer_distances <= maxdist
+
+            numbers = numpy.concatenate((numbers, buffer_numbers[valid]))
+            distances = numpy.concatenate(
+                (distances, buffer_distances[valid])
+            )
+
+        # Skip any points which are not enabled in the mask.
+        if mask is not None:
+            valid = mask[numbers]
+
+            numbers = numbers[valid]
+            distances = distances[valid]
+
+        return numbers, distances
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def compact(self):
+        """Whether the cloud is using compact storage."""
+        return self._compact
+
+    @property
+    def nbytes(self):
+        """The approximate number of bytes used by the cloud's data.
+
+        This includes the tree's position data, the point map and any lookup,
+        update and attribute arrays.  It does not include the tree's node
+        structure or the source geometry.
+
+        """
+        arrays = [
+            numpy.asarray(self._tree.data),
+            self._point_map,
+            self._point_index,
+            self._stale,
+        ]
+
+        if self._buffer_arrays is not None:
+            arrays.extend(self._buffer_arrays)
+
+        arrays.extend(self._attrib_values.values())
+
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    @property
+    def num_elements(self):
+        """The number of points in the cloud."""
+        return self._tree.n - self._num_stale + len(self._buffer)
+
+    @property
+    def num_pending(self):
+        """The number of changes not yet built into the tree."""
+        return self._num_stale + len(self._buffer)
+
+    # =========================================================================
+
+    @property
+    def rebuild_threshold(self):
+        """The fraction of pending changes which will trigger a full rebuild
+        of the tree.
+
+        """
+        return self._rebuild_threshold
+
+    @rebuild_threshold.setter
+    def rebuild_threshold(self, rebuild_threshold):
+        self._rebuild_threshold = rebuild_threshold
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def clearAttributeCache(self):
+        """Clear any attribute values read from the geometry.
+
+        This should be called if the attribute values of the geometry have
+        changed.
+
+        """
+        self._attrib_values.clear()
+
+    def crossQuery(self, other, maxdist):
+        """Find all pairs of points between this cloud and another which are
+        within maxdist of each other.
+
+        Returns an (N, 2) array of point numbers where the first column
+        contains points from this cloud and the second from the other.
+
+        Any pending updates to either cloud will be built into their trees
+        before searching.
+
+        """
+        for cloud in (self, other):
+            if cloud.num_pending:
+                cloud.rebuild()
+
+        # A list of the indexes in the other tree for each of our points.
+        results = self._tree.query_ball_tree(other._tree, maxdist)
+
+        counts = numpy.array([len(result) for result in results], dtype=int)
+
+        if not counts.sum():
+            return numpy.empty((0, 2), dtype=int)
+
+        # Flatten the per point results into index pairs.
+        indexes = numpy.repeat(numpy.arange(len(results)), counts)
+        other_indexes = numpy.fromiter(
+            (index for result in results for index in result),
+            dtype=int,
+            count=counts.sum()
+        )
+
+        return numpy.column_stack(
+            (
+                self._mapIndexPairs(indexes),
+                other._mapIndexPairs(other_indexes)
+            )
+        )
+
+    def filterAttributes(self, position, attrib_names, maxdist,
+                         num_points=None, kernel="pcfilter", mask=None):
+        """Compute kernel weighted averages of attribute values for points
+        around the position, similar to VEX's pcfilter().
+
+        If num_points is None then all points within maxdist are used,
+        otherwise only the closest N of them are.  The kernel is one of the
+        names in KERNELS and is evaluated on the distance relative to maxdist.
+
+        Returns a dictionary of attribute names to averaged values.  If no
+        points contribute then the values will be zero.
+
+        """
+        if kernel not in KERNELS:
+            raise ValueError("Invalid kernel: {}".format(kernel))
+
+        if num_points is None:
+            numbers, distances = self._searchRadius(position, maxdist, mask)
+
+        else:
+            numbers, distances = self._searchNearest(
+                position,
+                num_points,
+                maxdist,
+                mask
+            )
+
+        # Compute the normalized weights for each point.
+        weights = KERNELS[kernel](numpy.clip(distances / maxdist, 0.0, 1.0))
+
+        total = weights.sum()
+
+        if total > 0:
+            weights = weights / total
+
+        results = {}
+
+        for name in attrib_names:
+            values = self._getAttributeValues(name)
+
+            if values.dtype == object:
+                raise ValueError(
+                    "Cannot filter string attribute: {}".format(name)
+                )
+
+            results[name] = numpy.dot(weights, values[numbers])
+
+        return results
+
+    def findAllClosePoints(self, position, maxdist, mask=None):
+        """Find all points within the maxdist from the position.
+
+        If a mask (a sequence of booleans indexed by point number) is passed
+        then only points enabled in it will be found.  A ValueError is raised
+        if it doesn't cover every point number in the cloud, including any
+        inserted points.
+
+        """
+        numbers, _ = self._searchRadius(position, maxdist, mask)
 
         # Return any points that are found.
-        return self._getResultPoints(result[0])
+        return self._getResultPoints(numbers.tolist())
+
+    def findNearestPoints(self, position, num_points=1, maxdist=None,
+                          mask=None):
+        """Find the closest N points to the position
+
+        If a mask (a sequence of booleans indexed by point number) is passed
+        then only points enabled in it will be found.  A ValueError is raised
+        if it doesn't cover every point number in the cloud, including any
+        inserted points.
 
-    def findNearestPoints(self, position, num_points=1, maxdist=None):
-        """Find the closest N points to the position"""
+        """
         # Make sure we aren't querying for more points than we have.
-        if num_points > self._num_elements:
-            num_points = self._num_elements
+        if num_points > self.num_elements:
+            num_points = self.num_elements
 
         # Return no points if we ask for an invalid number of points.
         if num_points < 1:
             return ()
 
-        # Convert the position to a compatible ndarray.
-        positions = numpy.array([position])
+        numbers, _ = self._searchNearest(position, num_points, maxdist, mask)
+
+        # Return the tuple of points.
+        return self._getResultPoints(numbers.tolist())
 
-        # Query the tree.
-        result = self._tree.query(positions, num_points)
+    def gatherAttributes(self, position, attrib_names, maxdist=None,
+                         num_points=None, mask=None):
+        """Gather attribute values for points around the position.
 
-        # Get the list of found indexes.
-        indexes = result[1][0]
+        If num_points is None then all points within maxdist are gathered,
+        otherwise the closest N points (optionally within maxdist) are.
 
-        # If the maxdist is not None then we specified a maximum distance points
-        # can be within.
-        if maxdist is not None:
-            # Get the distances each match is from the target position.
-            distances = result[0][0]
+        Returns a dictionary of attribute names to arrays of values with one
+        row per found point, ordered by distance when searching for the
+        closest points.  The found point numbers and their distances are
+        available under the 'ptnum' and 'distance' keys.
 
-            # Check the type of the distances list.  If it is a numpy array
-            # then more than 1 point was found.
-            if isinstance(distances, numpy.ndarray):
-                # Filter the index list to remove those too far away.
-                indexes = [index for dist, index in zip(distances, indexes)
-                           if dist < maxdist]
+        """
+        if num_points is None:
+            if maxdist is None:
+                raise ValueError("Either maxdist or num_points must be set.")
+
+            numbers, distances = self._searchRadius(position, maxdist, mask)
 
-                # There are some points within the max distance so get them.
-                if len(indexes) > 0:
-                    near_points = self._getResultPoints(indexes)
+        else:
+            num_points = min(num_points, self.num_elements)
 
-                else:
-                    near_points = ()
+            if num_points < 1:
+                numbers = numpy.empty(0, dtype=int)
+                distances = numpy.empty(0)
 
-            # Only 1 point was requested/found.
             else:
-                # If the point is within the distances, glob and return it.
-                if distances < maxdist:
-                    near_points = self._getResultPoints((indexes, ))
+                numbers, distances = self._searchNearest(
+                    position,
+                    num_points,
+                    maxdist,
+                    mask
+                )
 
-                else:
-                    near_points = ()
+        results = {
+            "ptnum": numbers,
+            "distance": distances,
+        }
 
-        #  We don't care about the points being within a certain distance.
-        else:
-            # If the point list is an array then more than one point was found.
-            if isinstance(indexes, numpy.ndarray):
-                near_points = self._getResultPoints(indexes.tolist())
+        for name in attrib_names:
+            results[name] = self._getAttributeValues(name)[numbers]
 
-            else:
-                # We found a single point, so pass it along in a tuple..
-                near_points = self._getResultPoints((indexes, ))
+        return results
 
-        # Return the tuple of points.
-        return near_points
+    def queryPairs(self, maxdist):
+        """Find all pairs of points in the cloud which are within maxdist of
+        each other.
+
+        Returns an (N, 2) array of point numbers.  Each pair is only
+        returned once.
+
+        Any pending updates will be built into the tree before searching.
+
+        """
+        if self.num_pending:
+            self.rebuild()
+
+        pairs = self._tree.query_pairs(maxdist)
+
+        if not pairs:
+            return numpy.empty((0, 2), dtype=int)
+
+        pairs = numpy.array(sorted(pairs), dtype=int)
+
+        return self._mapIndexPairs(pairs)
+
+    def rebuild(self):
+        """Rebuild the tree from all current point positions."""
+        numbers, data = self._getLiveData()
+
+        self._point_map = numbers.astype(self._int_type)
+        self._point_index = None
+
+        self._tree = KDTree(
+            data.astype(self._float_type, copy=False),
+            self._leaf_size
+        )
+
+        # Reset the incremental update state.
+        self._stale = None
+        self._num_stale = 0
+        self._buffer = {}
+        self._buffer_arrays = None
+        self._mask_size = None
+
+    def update(self, changed=None, inserted=None, deleted=None,
+               geometry=None):
+        """Update the cloud with changed, inserted and deleted points.
+
+        changed and inserted are dictionaries (or sequences of pairs) of
+        points/point numbers to their new positions while deleted is a
+        sequence of points/point numbers.  If points are being inserted then
+        the geometry containing them should also be passed so that the new
+        points can be returned from queries.
+
+        Returns True if the update caused the tree to be rebuilt.
+
+        """
+        if geometry is not None:
+            self._geometry = geometry
+
+            # Any cached attribute values may no longer be valid.
+            self.clearAttributeCache()
+
+        for points in (changed, inserted):
+            if points is None:
+                continue
+
+            for point, position in dict(points).iteritems():
+                number = _getPointNumber(point)
+
+                self._markStale(number)
+                self._buffer[number] = tuple(position)
+
+        if deleted is not None:
+            for point in deleted:
+                number = _getPointNumber(point)
+
+                self._markStale(number)
+                self._buffer.pop(number, None)
+
+        # The buffer may have been modified.
+        self._buffer_arrays = None
+        self._mask_size = None
+
+        # Rebuild the tree if there are too many pending changes to make
+        # searching the buffer worthwhile.
+        if self.num_pending > self.rebuild_threshold * self.num_elements:
+            self.rebuild()
+
+            return True
+
+        return False
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
+# =============================================================================
+
+
+def _getPointNumber(point):
+    """Get a point number from a hou.Point or point number."""
+    if isinstance(point, hou.Point):
+        return point.number()
+
+    return int(point)
+
+
+def _gaussianKernel(distances):
+    """Gaussian falloff which drops to about 2% at the search radius."""
+    return numpy.exp(-4.0 * distances ** 2)
+
+
+def _linearKernel(distances):
+    """Linear falloff from the search position to the search radius."""
+    return 1.0 - distances
+
+
+def _pcfilterKernel(distances):
+    """Smooth falloff matching the weighting used by VEX's pcfilter()."""
+    return 1.0 - distances * distances * (3.0 - 2.0 * distances)
+
+
+def _uniformKernel(distances):
+    """Equal weighting for all points."""
+    return numpy.ones(len(distances))
+
+# =============================================================================
 
+# Weighting functions available for filtering attributes. Each is passed an
+# array of distances normalized to the search radius.
+KERNELS = {
+    "gaussian": _gaussianKernel,
+    "linear": _linearKernel,
+    "pcfilter": _pcfilterKernel,
+    "uniform": _uniformKernel,
+}
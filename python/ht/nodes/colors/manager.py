@@ -15,6 +15,8 @@ import os
 # Houdini Toolbox Imports
 from ht.nodes.colors.colors import ColorConstant, ColorEntry, ConstantEntry
 import ht.utils
+from ht.utils.paths import clearPathCache, findDirectories
+from ht.utils.patterns import PatternMatcher
 
 # Houdini Imports
 import hou
@@ -35,6 +37,10 @@ class ColorManager(object):
         self._nodes = {}
         self._tools = {}
 
+        # Compiled pattern matchers for the entries of each color type
+        # category.
+        self._matchers = {}
+
         # Build mappings for this object.
         self._buildMappings()
 
@@ -174,6 +180,31 @@ class ColorManager(object):
 
         return None
 
+    def _getMatchingEntry(self, assign_type, category_name, name):
+        """Find the first entry of a color type category whose name pattern
+        matches a name.
+
+        """
+        key = (assign_type, category_name)
+
+        # Compile the entry patterns the first time they are used.
+        if key not in self._matchers:
+            entries = getattr(self, assign_type)[category_name].values()
+
+            self._matchers[key] = (
+                entries,
+                PatternMatcher([entry.name for entry in entries])
+            )
+
+        entries, matcher = self._matchers[key]
+
+        index = matcher.firstMatch(name)
+
+        if index is None:
+            return None
+
+        return entries[index]
+
     def _getNameEntry(self, node):
         """Look for a color match based on the node name."""
         # The node name.
@@ -185,9 +216,14 @@ class ColorManager(object):
             # Check for entries for the node type category.
             if category_name in self.names:
                 # Check if the name matches any of the category entries.
-                for color_entry in self.names[category_name].itervalues():
-                    if hou.patternMatch(color_entry.name, name):
-                        return self._resolveEntry(color_entry)
+                color_entry = self._getMatchingEntry(
+                    "names",
+                    category_name,
+                    name
+                )
+
+                if color_entry is not None:
+                    return self._resolveEntry(color_entry)
 
         return None
 
@@ -209,9 +245,14 @@ class ColorManager(object):
                     # Check if the node name is in the mapping.
 
                     # Check if the location matches any of the category entries.
-                    for color_entry in self.tools[category_name].itervalues():
-                        if hou.patternMatch(color_entry.name, location):
-                            return self._resolveEntry(color_entry)
+                    color_entry = self._getMatchingEntry(
+                        "tools",
+                        category_name,
+                        location
+                    )
+
+                    if color_entry is not None:
+                        return self._resolveEntry(color_entry)
 
         return None
 
@@ -228,9 +269,14 @@ class ColorManager(object):
             if category_name in self.nodes:
                 # Check if the node type name matches any of the category
                 # entries.
-                for color_entry in self.nodes[category_name].itervalues():
-                    if hou.patternMatch(color_entry.name, type_name):
-                        return self._resolveEntry(color_entry)
+                color_entry = self._getMatchingEntry(
+                    "nodes",
+                    category_name,
+                    type_name
+                )
+
+                if color_entry is not None:
+                    return self._resolveEntry(color_entry)
 
         return None
 
@@ -335,6 +381,11 @@ class ColorManager(object):
         self.nodes.clear()
         self.tools.clear()
 
+        self._matchers.clear()
+
+        # Look for any new files.
+        clearPathCache()
+
         self._buildMappings()
 
 # =============================================================================
@@ -405,15 +456,9 @@ def _buildColor(data):
 
 def _findFiles():
     """Find any .json files that should be read."""
-    try:
-        directories = hou.findDirectories("config/colors")
-
-    except hou.OperationFailed:
-        directories = []
-
     all_files = []
 
-    for directory in directories:
+    for directory in findDirectories("config/colors"):
         all_files.extend(glob.glob(os.path.join(directory, "*.json")))
 
     return all_files
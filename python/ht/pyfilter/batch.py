@@ -0,0 +1,263 @@
+"""This module contains functions for applying PyFilter operations to many IFD
+files in parallel.
+
+Each file is filtered in a separate worker process using an IfdFilter with
+its own PyFilterManager so the same operations and rules are applied as when
+rendering.  The PyFilter args used, and a hash of any rule files they
+reference, are recorded in a comment on the first line of each output file.
+This allows files that have already been filtered with the same args and
+rules to be skipped when a batch is run again.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Standard Library Imports
+from collections import namedtuple
+import hashlib
+import multiprocessing
+import os
+import re
+import shlex
+import time
+import traceback
+
+# Houdini Toolbox Imports
+from ht.pyfilter.ifdfilter import IfdFilter, openFile
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# The result of filtering a file.  status is one of "filtered", "skipped" or
+# "failed".
+BatchResult = namedtuple(
+    "BatchResult",
+    ("input_path", "output_path", "status", "size", "duration", "error")
+)
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
+# =============================================================================
+
+def _buildComment(args):
+    """Build the comment recording the args a file was filtered with.
+
+    If the args reference any rule files a hash of their contents is
+    included so changing the rules invalidates previously filtered files.
+
+    """
+    comment = "{}{}".format(_COMMENT_PREFIX, " ".join(args))
+
+    paths = _getRuleFiles(args)
+
+    if paths:
+        digest = hashlib.sha1()
+
+        for path in paths:
+            digest.update(path)
+
+            try:
+                with open(path, "rb") as handle:
+                    digest.update(handle.read())
+
+            # Missing files are still part of the hash by name.
+            except IOError:
+                pass
+
+        comment = "{} (rules {})".format(comment, digest.hexdigest())
+
+    return comment
+
+
+def _filterJob(job):
+    """Filter a single file.
+
+    This is run in the worker processes so any errors are caught and
+    returned as part of the result.
+
+    """
+    input_path, output_path, args, force = job
+
+    start = time.time()
+
+    try:
+        size = os.path.getsize(input_path)
+
+        if not force and isUpToDate(input_path, output_path, args):
+            return BatchResult(
+                input_path, output_path, "skipped", size, 0.0, None
+            )
+
+        # Write to a temporary file and move it into place once it is
+        # complete so an interrupted batch never leaves partial files and
+        # files can be filtered in place.
+        directory, name = os.path.split(output_path)
+
+        temp_path = os.path.join(
+            directory,
+            ".{}.{}".format(os.getpid(), name)
+        )
+
+        try:
+            ifd_filter = IfdFilter(args=args)
+            ifd_filter.filterFile(input_path, temp_path, _buildComment(args))
+
+            os.rename(temp_path, output_path)
+
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    except Exception:
+        return BatchResult(
+            input_path,
+            output_path,
+            "failed",
+            0,
+            time.time() - start,
+            traceback.format_exc()
+        )
+
+    return BatchResult(
+        input_path, output_path, "filtered", size, time.time() - start, None
+    )
+
+
+def _getRuleFiles(args):
+    """Get the paths of the rule files referenced by PyFilter args."""
+    paths = []
+
+    args = iter(args)
+
+    for arg in args:
+        name, _, value = arg.partition("=")
+
+        if name not in _RULE_FILE_ARGS:
+            continue
+
+        if not value:
+            value = next(args, None)
+
+        if value:
+            paths.append(value)
+
+    return paths
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def buildArgs(*arg_strings):
+    """Build a list of PyFilter args from argument strings such as those
+    returned by PyFilterOperation.buildArgString().
+
+    Empty or None strings are ignored.
+
+    """
+    args = []
+
+    for arg_string in arg_strings:
+        if arg_string:
+            args.extend(shlex.split(arg_string))
+
+    return args
+
+
+def expandFramePattern(pattern, frame):
+    """Expand frame tokens in a path for a frame.
+
+    $F and $F<padding> tokens are replaced, as are runs of '#' characters
+    where the number of characters is the padding.
+
+    """
+    def replaceVariable(match):
+        padding = int(match.group(1) or 0)
+
+        return str(frame).zfill(padding)
+
+    path = _FRAME_VAR_REGEX.sub(replaceVariable, pattern)
+
+    return _FRAME_HASH_REGEX.sub(
+        lambda match: str(frame).zfill(len(match.group(0))),
+        path
+    )
+
+
+def filterFiles(paths, args, processes=None, force=False, callback=None):
+    """Filter a list of (input path, output path) tuples in parallel.
+
+    If processes is None a worker is used for each CPU.  Files which are
+    already up to date are skipped unless force is True.  If a callback is
+    passed it is called with each BatchResult as files are completed.
+
+    Returns a list of BatchResults in the order files were completed.
+
+    """
+    jobs = [
+        (input_path, output_path, list(args), force)
+        for input_path, output_path in paths
+    ]
+
+    if not jobs:
+        return []
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    processes = max(1, min(processes, len(jobs)))
+
+    results = []
+
+    # Use a new process for each file so state left in modules by
+    # operations cannot affect other files.
+    pool = multiprocessing.Pool(processes, maxtasksperchild=1)
+
+    try:
+        for result in pool.imap_unordered(_filterJob, jobs):
+            results.append(result)
+
+            if callback is not None:
+                callback(result)
+
+        pool.close()
+
+    except:
+        pool.terminate()
+        raise
+
+    finally:
+        pool.join()
+
+    return results
+
+
+def isUpToDate(input_path, output_path, args):
+    """Check if an output file was filtered from the current input file with
+    the same args and rule files.
+
+    """
+    if not os.path.isfile(output_path):
+        return False
+
+    # The input has been modified since the output was written.
+    if os.path.getmtime(output_path) < os.path.getmtime(input_path):
+        return False
+
+    with openFile(output_path, "rb") as handle:
+        first_line = handle.readline()
+
+    return first_line.rstrip("\n") == "# {}".format(_buildComment(args))
+
+# =============================================================================
+
+_COMMENT_PREFIX = "PyFilter args: "
+
+_FRAME_HASH_REGEX = re.compile("#+")
+
+_FRAME_VAR_REGEX = re.compile(r"\$F(\d*)")
+
+# PyFilter args which take the path of a rule file.
+_RULE_FILE_ARGS = ("-geobudget", "-propertiesfile")
@@ -0,0 +1,528 @@
+"""This module contains classes for applying PyFilter operations to IFD
+files without running Mantra.
+
+IFD files are streamed line by line.  Mantra property lookups made by the
+operations are answered from the properties declared in the IFD by installing
+a stand-in 'mantra' module, and each filter stage is run at the point in the
+file where Mantra would run it:
+
+    filterCamera        Before the first object, light, fog or segment block
+                        of a frame.
+    filterPlane         At the end of each plane block.
+    filterCameraSegment At the end of each segment block.
+    filterInstance      At the end of each object block.
+    filterLight         At the end of each light block.
+    filterFog           At the end of each fog block.
+    filterMaterial      At the end of each material block.
+    filterRender        Before ray_raytrace.
+    filterEndRender     After ray_raytrace.
+    filterQuit          Before ray_quit.
+
+Any property values changed by a stage are written as additional ray_property
+lines at the point the stage runs, overriding the original values since the
+last value Mantra reads wins.  Changes to image:filename rewrite the
+ray_image line instead.
+
+Only the global settings of the frame currently being filtered are held in
+memory so the memory used does not depend on the size of the IFD.  Inline
+geometry blocks are passed through untouched and filterGeometry is not run.
+
+Properties which are not declared in the IFD are given Mantra's default
+values where the operations rely on them.  Other undeclared properties have
+no values.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Standard Library Imports
+import gzip
+import re
+import shlex
+import sys
+import types
+
+# Houdini Toolbox Imports
+from ht.pyfilter.logger import logger
+from ht.pyfilter.manager import PyFilterManager
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+class IfdPropertyState(object):
+    """Property values declared in an IFD stream.
+
+    This provides property() and setproperty() functions matching those of
+    the mantra module.
+
+    """
+
+    def __init__(self):
+        # Values declared outside of any block, keyed by "style:name".
+        self._globals = {}
+
+        # Values declared in the current block, or None when outside one.
+        self._block = None
+
+        # Names of properties set by filters, in the order they were set.
+        self._changed = []
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def beginBlock(self):
+        """Start collecting values for a new block."""
+        self._block = {}
+
+    def endBlock(self):
+        """Discard the values for the current block."""
+        self._block = None
+
+    def loadValues(self, name, values):
+        """Store the values for a property read from the IFD."""
+        if self._block is not None:
+            self._block[name] = values
+
+        else:
+            self._globals[name] = values
+
+    def popChanged(self):
+        """Get the names of any properties changed by filters since the last
+        call.
+
+        """
+        changed = self._changed
+
+        self._changed = []
+
+        return changed
+
+    def property(self, name):
+        """Get the list of values for a property.
+
+        If the property is not declared Mantra's default value is used.
+
+        """
+        if self._block is not None and name in self._block:
+            return list(self._block[name])
+
+        if name in self._globals:
+            return list(self._globals[name])
+
+        # Mantra names planes after their variable if there is no channel.
+        if name == "plane:channel":
+            return self.property("plane:variable")
+
+        return list(_DEFAULT_VALUES.get(name, ()))
+
+    def reset(self):
+        """Discard all values."""
+        self._globals.clear()
+        self._block = None
+        self._changed = []
+
+    def setproperty(self, name, values):
+        """Set the list of values for a property."""
+        if isinstance(values, (list, tuple)):
+            values = list(values)
+
+        else:
+            values = [values]
+
+        self.loadValues(name, values)
+
+        if name not in self._changed:
+            self._changed.append(name)
+
+# =============================================================================
+
+class IfdFilter(object):
+    """Apply PyFilter operations to IFD streams.
+
+    If a manager is not passed a PyFilterManager is created using the
+    passed PyFilter args.
+
+    """
+
+    def __init__(self, manager=None, args=None):
+        self._state = IfdPropertyState()
+
+        # Install the stand-in module before any operations are created so
+        # any property reads are answered from the IFD.
+        _installMantraModule(self._state)
+
+        if manager is None:
+            manager = PyFilterManager(args)
+
+        self._manager = manager
+
+        # Handlers for IFD commands, keyed by command name.
+        self._handlers = {
+            "ray_end": self._handleEnd,
+            "ray_image": self._handleImage,
+            "ray_property": self._handleProperty,
+            "ray_quit": self._handleQuit,
+            "ray_raytrace": self._handleRaytrace,
+            "ray_reset": self._handleReset,
+            "ray_start": self._handleStart,
+            "ray_time": self._handleTime,
+        }
+
+        self._output = None
+        self._resetFrame()
+
+    # =========================================================================
+    # NON-PUBLIC METHODS
+    # =========================================================================
+
+    def _filterCamera(self):
+        """Run the filterCamera stage and write out the held frame settings.
+
+        """
+        self._camera_filtered = True
+
+        self._runStage("filterCamera")
+
+        for line in self._header:
+            self._output.write(line)
+
+        self._header = None
+
+    def _handleEnd(self, line, tokens):
+        """Handle the end of a block."""
+        stage = _BLOCK_STAGES.get(self._block_type)
+
+        if stage is not None:
+            self._runStage(stage, self._block_indent + "    ")
+
+        self._state.endBlock()
+
+        self._block_type = None
+
+        self._write(line)
+
+    def _handleImage(self, line, tokens):
+        """Handle setting the output image."""
+        self._state.loadValues("image:filename", tokens[-1:])
+
+        self._startHeader()
+
+        if self._header is not None:
+            self._image = (len(self._header), line, tokens)
+
+        self._write(line)
+
+    def _handleProperty(self, line, tokens):
+        """Handle a property declaration."""
+        if len(tokens) >= 3:
+            self._state.loadValues(
+                "{}:{}".format(tokens[1], tokens[2]),
+                [_parseToken(token) for token in tokens[3:]]
+            )
+
+        if self._block_type is None:
+            self._startHeader()
+
+        self._write(line)
+
+    def _handleQuit(self, line, tokens):
+        """Handle the end of the IFD."""
+        self._runStage("filterQuit")
+
+        self._write(line)
+
+    def _handleRaytrace(self, line, tokens):
+        """Handle the start of rendering."""
+        if not self._camera_filtered:
+            self._startHeader()
+            self._filterCamera()
+
+        self._runStage("filterRender", _getIndent(line))
+
+        self._write(line)
+
+        # There is nothing to render so the render has ended.
+        self._manager.runFilters("filterEndRender")
+        self._state.popChanged()
+
+    def _handleReset(self, line, tokens):
+        """Handle resetting the renderer between frames."""
+        self._write(line)
+
+        self._state.reset()
+
+        self._resetFrame()
+
+    def _handleStart(self, line, tokens):
+        """Handle the start of a block."""
+        block_type = tokens[1] if len(tokens) > 1 else None
+
+        if self._header is not None and block_type not in ("geo", "plane"):
+            self._filterCamera()
+
+        self._block_type = block_type
+        self._block_indent = _getIndent(line)
+
+        self._state.beginBlock()
+
+        self._write(line)
+
+    def _handleTime(self, line, tokens):
+        """Handle the start of a frame."""
+        self._startHeader()
+
+        self._write(line)
+
+    def _processLine(self, line):
+        """Process a line of the IFD."""
+        # Inline geometry is passed through untouched.  The end of the
+        # block can follow binary geometry data on the same line so only a
+        # ray_end at the start of the line or directly after the closing
+        # bracket of the geometry ends it.
+        if self._block_type == "geo":
+            if _GEO_END_EXPR.search(line) is not None:
+                self._state.endBlock()
+                self._block_type = None
+
+            self._write(line)
+            return
+
+        stripped = line.lstrip()
+
+        # Most lines are not commands we are interested in.
+        if not stripped.startswith("ray_"):
+            self._write(line)
+            return
+
+        command = stripped.split(None, 1)[0]
+
+        handler = self._handlers.get(command)
+
+        if handler is None:
+            self._write(line)
+            return
+
+        handler(line, shlex.split(stripped, comments=True))
+
+    def _resetFrame(self):
+        """Reset the per-frame state."""
+        self._block_indent = ""
+        self._block_type = None
+        self._camera_filtered = False
+
+        # Lines held until filterCamera is run, or None if lines are not
+        # being held.
+        self._header = None
+
+        # The (header index, line, tokens) of the ray_image line.
+        self._image = None
+
+    def _runStage(self, stage, indent=""):
+        """Run the filters for a stage and write out any changed properties.
+
+        """
+        self._manager.runFilters(stage)
+
+        for name in self._state.popChanged():
+            values = self._state.property(name)
+
+            if name == "image:filename" and self._image is not None:
+                self._setImageFilename(values)
+                continue
+
+            style, _, prop = name.partition(":")
+
+            tokens = ["ray_property", style, prop]
+            tokens.extend(_formatValue(value) for value in values)
+
+            self._write("{}{}\n".format(indent, " ".join(tokens)))
+
+    def _setImageFilename(self, values):
+        """Rewrite the ray_image line with a new file name."""
+        index, line, tokens = self._image
+
+        new_line = "{}{} {}\n".format(
+            _getIndent(line),
+            " ".join(tokens[:-1]),
+            " ".join(_formatValue(value) for value in values)
+        )
+
+        if self._header is not None:
+            self._header[index] = new_line
+
+        else:
+            logger.warning(
+                "Cannot change image:filename after ray_image was written"
+            )
+
+    def _startHeader(self):
+        """Start holding lines until filterCamera is run."""
+        if self._header is None and not self._camera_filtered:
+            self._header = []
+
+    def _write(self, line):
+        """Write a line, holding it if filterCamera has not run."""
+        if self._header is not None:
+            self._header.append(line)
+
+        else:
+            self._output.write(line)
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def manager(self):
+        """The PyFilterManager running the operations."""
+        return self._manager
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def filterFile(self, input_path, output_path, comment=None):
+        """Filter an IFD file, writing the result to another file.
+
+        Files ending in '.gz' are read and written compressed.  If a comment
+        is passed it is written as the first line of the output.
+
+        """
+        with openFile(input_path, "rb") as source:
+            with openFile(output_path, "wb") as destination:
+                if comment is not None:
+                    destination.write("# {}\n".format(comment))
+
+                self.filterStream(source, destination)
+
+    def filterStream(self, source, destination):
+        """Filter IFD lines from an iterable, writing the result to a file
+        object.
+
+        """
+        self._output = destination
+
+        self._state.reset()
+        self._resetFrame()
+
+        try:
+            for line in source:
+                self._processLine(line)
+
+            # Write out anything still being held.
+            if self._header is not None:
+                self._filterCamera()
+
+        finally:
+            self._output = None
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
+# =============================================================================
+
+def _formatValue(value):
+    """Format a property value for writing to an IFD."""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+
+    if isinstance(value, (int, long)):
+        return str(value)
+
+    if isinstance(value, float):
+        return repr(value)
+
+    value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+    return '"{}"'.format(value)
+
+
+def _getIndent(line):
+    """Get the leading whitespace of a line."""
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _installMantraModule(state):
+    """Install a stand-in mantra module backed by a property state."""
+    module = types.ModuleType("mantra")
+
+    module.property = state.property
+    module.setproperty = state.setproperty
+
+    sys.modules["mantra"] = module
+
+    return module
+
+
+def _parseToken(token):
+    """Convert an IFD token to a number if possible."""
+    try:
+        return int(token)
+
+    except ValueError:
+        pass
+
+    try:
+        return float(token)
+
+    except ValueError:
+        return token
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def filterIfd(input_path, output_path, args=None):
+    """Apply the PyFilter operations enabled by args to an IFD file."""
+    ifd_filter = IfdFilter(args=args)
+
+    ifd_filter.filterFile(input_path, output_path)
+
+    ifd_filter.manager.writeProfile()
+
+    return ifd_filter
+
+
+def openFile(path, mode="rb"):
+    """Open an IFD file, using gzip if it is compressed."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+
+    return open(path, mode)
+
+# =============================================================================
+
+# Filter stages to run at the end of each block type.
+_BLOCK_STAGES = {
+    "fog": "filterFog",
+    "light": "filterLight",
+    "material": "filterMaterial",
+    "object": "filterInstance",
+    "plane": "filterPlane",
+    "segment": "filterCameraSegment",
+}
+
+# Mantra's values for properties read by operations which may not be in the
+# IFD.
+_DEFAULT_VALUES = {
+    "image:deepresolver": [],
+    "image:filename": ["ip"],
+    "image:resolution": [256, 256],
+    "image:samples": [3, 3],
+    "object:displacebound": [0.0],
+    "object:matte": [0],
+    "object:name": [""],
+    "object:phantom": [0],
+    "object:rendersubd": [0],
+    "object:shadingquality": [1.0],
+    "object:surface": [""],
+    "plane:variable": [""],
+    "renderer:renderlabel": [""],
+    "renderer:rendertype": ["beauty"],
+}
+
+# Matches the ray_end command which ends an inline geometry block.
+_GEO_END_EXPR = re.compile(r"(?:^\s*|\])ray_end\s*(?:#.*)?$")
@@ -1,16 +1,121 @@
-"""This module defines the logger for PyFilter operations."""
+"""This module defines the logger for PyFilter operations.
+
+The logger can be configured using environment variables:
+
+    HT_PYFILTER_LOG_LEVEL   The name of the level to log at, eg. INFO.
+                            Defaults to DEBUG.
+    HT_PYFILTER_LOG_ASYNC   If set to 1, records are passed to a queue and
+                            written by a background thread so logging does
+                            not block filtering.
+
+Expensive debug messages should be guarded with logger.isEnabledFor() so no
+work is done building them when they will not be output.
+
+"""
 
 # =============================================================================
 # IMPORTS
 # =============================================================================
 
+import atexit
 import logging
+import os
+import Queue
+import threading
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+class QueueHandler(logging.Handler):
+    """Handler which passes records to a queue to be handled elsewhere."""
+
+    def __init__(self, queue):
+        super(QueueHandler, self).__init__()
+
+        self._queue = queue
+
+    def emit(self, record):
+        """Add a record to the queue."""
+        try:
+            # Build the message now since any arguments may change before
+            # the record is handled.
+            record.msg = record.getMessage()
+            record.args = None
+
+            # Tracebacks cannot be formatted once the exception has been
+            # handled.
+            if record.exc_info:
+                record.exc_text = _EXCEPTION_FORMATTER.formatException(
+                    record.exc_info
+                )
+                record.exc_info = None
+
+            self._queue.put_nowait(record)
+
+        except Exception:
+            self.handleError(record)
+
+
+class QueueListener(threading.Thread):
+    """Thread which passes records from a queue to a handler."""
+
+    def __init__(self, queue, handler):
+        super(QueueListener, self).__init__(name="PyFilterLogWriter")
+
+        self.daemon = True
+
+        self._handler = handler
+        self._queue = queue
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def flush(self):
+        """Wait for any queued records to be written."""
+        self._queue.join()
+
+    def run(self):
+        """Handle records until a None record is received."""
+        while True:
+            record = self._queue.get()
+
+            try:
+                if record is None:
+                    return
+
+                self._handler.handle(record)
+
+            finally:
+                self._queue.task_done()
+
+    def stop(self):
+        """Write any queued records and stop the thread."""
+        self._queue.put(None)
+
+        self.join()
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def flushLogs():
+    """Wait for any queued records to be written."""
+    if _LISTENER is not None:
+        _LISTENER.flush()
 
 # =============================================================================
 
 logger = logging.getLogger("PyFilter")
 
-logger.setLevel(logging.DEBUG)
+logger.setLevel(
+    getattr(
+        logging,
+        os.environ.get("HT_PYFILTER_LOG_LEVEL", "DEBUG").upper(),
+        logging.DEBUG
+    )
+)
 
 sh = logging.StreamHandler()
 
@@ -21,5 +126,20 @@ formatter = logging.Formatter(
 
 sh.setFormatter(formatter)
 
-logger.addHandler(sh)
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+_LISTENER = None
+
+if os.environ.get("HT_PYFILTER_LOG_ASYNC") == "1":
+    _queue = Queue.Queue()
+
+    logger.addHandler(QueueHandler(_queue))
+
+    _LISTENER = QueueListener(_queue, sh)
+    _LISTENER.start()
+
+    # Make sure everything is written before the process exits.
+    atexit.register(_LISTENER.stop)
 
+else:
+    logger.addHandler(sh)
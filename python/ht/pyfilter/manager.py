@@ -10,11 +10,14 @@ actions.
 import argparse
 import logging
 import json
+import sys
 
 # Houdini Toolbox Imports
 from ht.pyfilter.logger import logger
+from ht.pyfilter.property import propertySnapshot
 
 import ht.utils
+from ht.utils.paths import findFiles
 
 # =============================================================================
 # CLASSES
@@ -23,15 +26,22 @@ import ht.utils
 class PyFilterManager(object):
     """Manager class for PyFilter operations."""
 
-    def __init__(self):
+    def __init__(self, args=None):
         self._data = {}
         self._operations = []
 
+        # Filter functions to run for each stage, keyed by stage name.
+        self._dispatch = {}
+
+        # Timing information for filter calls, if profiling is enabled.
+        self._profile = None
+        self._profile_path = None
+
         # Populate the list of operations.
-        self._registerOperations()
+        self._registerOperations(args)
 
         # Build and parse any arguments.
-        self._parsePyFilterArgs()
+        self._parsePyFilterArgs(args)
 
     # =========================================================================
     # PROPERTIES
@@ -47,46 +57,114 @@ class PyFilterManager(object):
         """A list of registered operations."""
         return self._operations
 
+    @property
+    def profile(self):
+        """Timing information for filter calls, keyed by (operation, stage).
+
+        This is None if profiling is not enabled.
+
+        """
+        return self._profile
+
     # =========================================================================
     # NON-PUBLIC METHODS
     # =========================================================================
 
-    def _parsePyFilterArgs(self):
-        """Parse any args passed to PyFilter."""
+    def _buildStageDispatch(self, stage):
+        """Build the list of filter functions to run for a stage.
+
+        This is done the first time a stage is run in each render rather
+        than when the manager is created because operations may need to
+        query render properties to determine whether they should run.
+
+        """
+        funcs = []
+
+        for operation in self.operations:
+            # Skip operations that should not be run.
+            if not operation.shouldRun():
+                continue
+
+            # Attempt to find the function for this stage.
+            func = getattr(operation, stage, None)
+
+            # Filter has no function for this stage so don't do anything.
+            if func is None:
+                continue
+
+            # Record the time taken by each call.
+            if self.profile is not None:
+                func = self.profile.timeFunction(
+                    (operation.__class__.__name__, stage),
+                    func
+                )
+
+            funcs.append(func)
+
+        self._dispatch[stage] = tuple(funcs)
+
+        return self._dispatch[stage]
+
+    def _parsePyFilterArgs(self, args=None):
+        """Parse any args passed to PyFilter.
+
+        If args is None the command line arguments are parsed.
+
+        """
         parser = argparse.ArgumentParser()
 
         self._registerParserArgs(parser)
 
-        filter_args = parser.parse_known_args()[0]
+        filter_args = parser.parse_known_args(args)[0]
 
         self._processParsedArgs(filter_args)
 
     def _processParsedArgs(self, filter_args):
         """Allow operations to process any args that were parsed."""
+        if filter_args.pyfilterprofile is not None:
+            self._profile = ht.utils.TimingStats()
+
+            # A path to write the profile data to was passed.
+            if filter_args.pyfilterprofile:
+                self._profile_path = filter_args.pyfilterprofile
+
         for operation in self.operations:
             operation.processParsedArgs(filter_args)
 
-    def _registerOperations(self):
-        """Register operations that should be run by the manager."""
-        import hou
+        # Operations may now behave differently so rebuild any dispatch
+        # tables.
+        self._dispatch.clear()
 
-        # Look for files containing a list of operations.
-        try:
-            files = hou.findFiles("pyfilter/operations.json")
+    def _registerOperations(self, args=None):
+        """Register operations that should be run by the manager.
 
-        # If no files could be found then abort.
-        except hou.OperationFailed:
-            return
+        Operations are listed as [module name, class name] or as
+        [module name, class name, [args]].  Operations with a list of args
+        are only imported if one of those args was passed, which avoids
+        importing operations that would not do anything.  Args must be
+        passed in full, not abbreviated, for this to work.
+
+        """
+        passed_args = _getPassedArgs(args)
+
+        # Look for files containing a list of operations.
+        files = findFiles("pyfilter/operations.json")
 
         for filepath in files:
             with open(filepath) as fp:
-                data = json.load(fp, object_hook=ht.utils.convertFromUnicode)
+                data = json.load(fp, object_hook=ht.utils.convertUnicodeObject)
 
             if "operations" not in data:
                 continue
 
             for operation in data["operations"]:
-                module_name, class_name = operation
+                module_name, class_name = operation[:2]
+
+                # Skip operations which would not do anything.
+                if len(operation) > 2 and \
+                   passed_args.isdisjoint(operation[2]):
+                    logger.debug("Skipping {}".format(class_name))
+                    continue
 
                 # Import the operation class.
                 cls = getattr(
@@ -106,6 +184,16 @@ class PyFilterManager(object):
         available.
 
         """
+        parser.add_argument(
+            "-pyfilterprofile",
+            nargs="?",
+            default=None,
+            const="",
+            action="store",
+            help="Record filter call timings, optionally writing them as JSON "
+                 "to a file."
+        )
+
         for operation in self.operations:
             operation.registerParserArgs(parser)
 
@@ -114,24 +202,79 @@ class PyFilterManager(object):
     # =========================================================================
 
     def runFilters(self, stage, *args, **kwargs):
-        """Run all filter operations for the specified stage."""
-        results = []
+        """Run all filter operations for the specified stage.
 
-        for operation in self.operations:
-            # Skip operations that should not be run.
-            if not operation.shouldRun():
-                continue
+        Returns True if any of the filter functions returned True.
 
-            # Attempt to find the function for this stage.
-            try:
-                func = getattr(operation, stage)
+        """
+        try:
+            funcs = self._dispatch[stage]
 
-            # Filter has no function for this stage so don't do anything.
-            except AttributeError:
-                continue
+        except KeyError:
+            funcs = self._buildStageDispatch(stage)
+
+        # Whether operations should run can depend on the properties of the
+        # render, so rebuild the dispatch tables for the next render.
+        if stage == "filterEndRender":
+            self._dispatch.clear()
+
+        # Nothing to do for this stage.
+        if not funcs:
+            return False
+
+        result = False
+
+        # Batch property reads and writes made by the filters so each
+        # property is read at most once and changes are written once when
+        # all the filters have run.
+        with propertySnapshot():
+            for func in funcs:
+                # Run the filter.
+                if func(*args, **kwargs) == True:
+                    result = True
+
+        return result
+
+    def writeProfile(self):
+        """Write out any recorded filter call timings.
+
+        The summary is written to the log and, if a path was passed to
+        -pyfilterprofile, to a JSON file.
+
+        """
+        if self.profile is None:
+            return
+
+        logger.info("PyFilter profile:")
+
+        for line in self.profile.formatSummary():
+            logger.info("    {}".format(line))
+
+        if self._profile_path is not None:
+            with open(self._profile_path, "w") as handle:
+                json.dump(
+                    self.profile.toList(("operation", "stage")),
+                    handle,
+                    indent=4
+                )
+
+            logger.info(
+                "Wrote PyFilter profile to {}".format(self._profile_path)
+            )
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
+# =============================================================================
+
+def _getPassedArgs(args=None):
+    """Get the set of arg names in a list of args.
 
-            # Run the filter.
-            results.append(func(*args, **kwargs))
+    If args is None the command line arguments are used.
 
-        return True in results
+    """
+    if args is None:
+        args = sys.argv[1:]
 
+    return set(
+        arg.split("=", 1)[0] for arg in args if arg.startswith("-")
+    )
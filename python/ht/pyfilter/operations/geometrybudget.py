@@ -0,0 +1,235 @@
+"""This module contains an operation to cap object detail to keep renders
+within a memory budget.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Standard Library Imports
+import json
+
+# Houdini Toolbox Imports
+from ht.pyfilter.logger import logger
+from ht.pyfilter.operations.operation import PyFilterOperation, logFilter
+from ht.pyfilter.property import getProperty, setProperty
+import ht.utils
+from ht.utils.patterns import PatternMatcher
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+class GeometryBudget(PyFilterOperation):
+    """Operation to cap the detail of objects to keep renders within a
+    memory budget.
+
+    This operation creates and uses the -geobudget arg, which is the path to
+    a JSON rule file:
+
+    {
+        "rules": [
+            {
+                "pattern": "/obj/hero_* /obj/crowd_*",
+                "rendersubd": false,
+                "max_displacebound": 0.1,
+                "shadingquality_scale": 0.5
+            }
+        ]
+    }
+
+    Rules are matched against object:name in order and the first matching
+    rule is applied.  Each cap is optional:
+
+        rendersubd              If false, disable subdivision rendering.
+        max_displacebound       Clamp the displacement bound to this value.
+        shadingquality_scale    Scale the dicing (shading) quality.  Scales
+                                of 1 or more are ignored since they would
+                                not reduce detail.
+
+    Rules are applied to all render types, including shadow and photon
+    renders, so the rule file should only be passed to the renders that
+    should be reduced.
+
+    Objects which don't declare a property are treated as having Mantra's
+    default value.
+
+    """
+
+    def __init__(self, manager):
+        super(GeometryBudget, self).__init__(manager)
+
+        self._matcher = None
+        self._rules = []
+        self._rules_file = None
+
+        # Names of objects which were reduced, keyed by cap.
+        self._reduced = {}
+
+    # =========================================================================
+    # NON-PUBLIC METHODS
+    # =========================================================================
+
+    def _addReduction(self, cap, name):
+        """Record that a cap was applied to an object."""
+        self._reduced.setdefault(cap, []).append(name)
+
+    def _loadRules(self, rules_file):
+        """Load the rules from a rule file."""
+        try:
+            with open(rules_file) as handle:
+                data = json.load(
+                    handle,
+                    object_hook=ht.utils.convertUnicodeObject
+                )
+
+        except (IOError, ValueError) as inst:
+            logger.error(
+                "Could not load geometry budget rules from {}: {}".format(
+                    rules_file,
+                    inst
+                )
+            )
+
+            return
+
+        rules = data.get("rules", [])
+
+        for rule in rules:
+            if rule.get("shadingquality_scale", 0) > 1:
+                logger.warning(
+                    "Ignoring shadingquality_scale of {} for {}: scales "
+                    "above 1 do not reduce detail".format(
+                        rule["shadingquality_scale"],
+                        rule.get("pattern", "*")
+                    )
+                )
+
+        self._rules = rules
+        self._rules_file = rules_file
+
+        self._matcher = PatternMatcher(
+            [rule.get("pattern", "*") for rule in rules]
+        )
+
+        logger.debug(
+            "Loaded {} geometry budget rules from {}".format(
+                len(rules),
+                rules_file
+            )
+        )
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def reduced(self):
+        """Dictionary of cap names to lists of object names reduced during
+        the current render.
+
+        """
+        return self._reduced
+
+    @property
+    def rules(self):
+        """The list of rule dictionaries."""
+        return self._rules
+
+    @property
+    def rules_file(self):
+        """The path of the loaded rule file."""
+        return self._rules_file
+
+    # =========================================================================
+    # STATIC METHODS
+    # =========================================================================
+
+    @staticmethod
+    def buildArgString(rules_file):
+        return "-geobudget {}".format(rules_file)
+
+    @staticmethod
+    def registerParserArgs(parser):
+        """Register interested parser args for this operation."""
+        parser.add_argument(
+            "-geobudget",
+            default=None,
+            action="store",
+            help="Cap object detail using the rules in this file."
+        )
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    @logFilter
+    def filterEndRender(self):
+        """Log a summary of the objects which were reduced."""
+        if not self.reduced:
+            logger.info("Geometry budget: no objects reduced")
+
+        for cap, names in sorted(self.reduced.iteritems()):
+            listed = ", ".join(names[:_MAX_LISTED_NAMES])
+
+            if len(names) > _MAX_LISTED_NAMES:
+                listed += ", ..."
+
+            logger.info(
+                "Geometry budget: {} applied to {} objects: {}".format(
+                    cap,
+                    len(names),
+                    listed
+                )
+            )
+
+        self._reduced = {}
+
+    @logFilter("object:name")
+    def filterInstance(self):
+        """Apply any detail caps to the object."""
+        name = getProperty("object:name")[0]
+
+        index = self._matcher.firstMatch(name)
+
+        if index is None:
+            return
+
+        rule = self.rules[index]
+
+        if not rule.get("rendersubd", True):
+            if (getProperty("object:rendersubd") or [0])[0]:
+                setProperty("object:rendersubd", 0)
+                self._addReduction("rendersubd", name)
+
+        max_bound = rule.get("max_displacebound")
+
+        if max_bound is not None:
+            bound = (getProperty("object:displacebound") or [0])[0]
+
+            if bound > max_bound:
+                setProperty("object:displacebound", max_bound)
+                self._addReduction("max_displacebound", name)
+
+        scale = rule.get("shadingquality_scale")
+
+        if scale is not None and scale < 1:
+            quality = (getProperty("object:shadingquality") or [1])[0]
+
+            setProperty("object:shadingquality", quality * scale)
+            self._addReduction("shadingquality_scale", name)
+
+    def processParsedArgs(self, filter_args):
+        """Process any of our interested arguments if they were passed."""
+        if filter_args.geobudget is not None:
+            self._loadRules(filter_args.geobudget)
+
+    def shouldRun(self):
+        """Only run if a rule file was loaded."""
+        return self._matcher is not None
+
+# =============================================================================
+
+# The number of object names to list for each cap in the summary.
+_MAX_LISTED_NAMES = 10
@@ -7,12 +7,15 @@
 # =============================================================================
 
 # Standard Library Imports
+import json
 import math
+import os
+import time
 
 # Houdini Toolbox Imports
 from ht.pyfilter.logger import logger
 from ht.pyfilter.operations.operation import PyFilterOperation, logFilter
-from ht.pyfilter.property import setProperty
+from ht.pyfilter.property import getProperty, setProperty
 
 # =============================================================================
 # CLASSES
@@ -24,19 +27,154 @@ class IpOverrides(PyFilterOperation):
     def __init__(self, manager):
         super(IpOverrides, self).__init__(manager)
 
+        self._adaptive_target = None
         self._disable_aovs = False
         self._disable_blur = False
         self._disable_deep = False
         self._disable_displacement = False
         self._disable_subd = False
         self._enabled = False
+        self._profile_file = None
+        self._profile_key = None
         self._res_scale = 1.0
         self._sample_scale = None
 
+        # The time the current render started, when rendering adaptively.
+        self._render_start = None
+
+        # The fraction of the full scale pixel samples actually rendered in
+        # the current render.
+        self._render_work = None
+
+        # The fraction of the full scale pixel samples chosen to render in
+        # the target time, if the scales were reduced.
+        self._target_work = None
+
+        # The (res_scale, sample_scale, disable_aovs) settings from before
+        # the scales were chosen for the current render.
+        self._base_settings = None
+
+    # =========================================================================
+    # NON-PUBLIC METHODS
+    # =========================================================================
+
+    def _applyAdaptiveScales(self):
+        """Choose scales for the current render from previous timings.
+
+        This is done by whichever of filterPlane or filterCamera is called
+        first since Mantra filters image planes before the camera.
+
+        """
+        # Scales have already been chosen for this render.
+        if self._render_start is not None:
+            return
+
+        self._render_start = time.time()
+
+        self._base_settings = (
+            self.res_scale,
+            self.sample_scale,
+            self.disable_aovs
+        )
+
+        profiles = _loadProfiles(self.profile_file)
+
+        profile = profiles.get(self._getProfileKey())
+
+        # Nothing is known about this render so use the defaults until it
+        # has been timed.
+        if profile is not None and profile.get("samples"):
+            self._chooseScales(*fitRenderCost(profile["samples"]))
+
+    def _chooseScales(self, fixed, cost):
+        """Choose the scales to render at from the estimated fixed time and
+        full scale sampling time.
+
+        """
+        res_scale, sample_scale = computeAdaptiveScales(
+            fixed,
+            cost,
+            self.adaptive_target
+        )
+
+        logger.info(
+            "Adaptive ip scales: resolution {:.3f}, samples {:.3f}".format(
+                res_scale,
+                sample_scale
+            )
+        )
+
+        self.res_scale = res_scale
+        self.sample_scale = sample_scale
+
+        if res_scale * sample_scale < 1:
+            self._target_work = (res_scale * sample_scale) ** 2
+
+        # Even the lowest scales won't hit the target so drop the extra
+        # image planes as well.
+        estimate = fixed + cost * (res_scale * sample_scale) ** 2
+
+        if estimate > self.adaptive_target:
+            self.disable_aovs = True
+
+    def _getProfileKey(self):
+        """Get the key to store timings for the current render under.
+
+        Unless a key was passed this is built from the hip file, camera and
+        render type.  The camera is taken from the render label, which
+        soho sets to the camera path followed by the render type.
+
+        """
+        if self.profile_key is not None:
+            return self.profile_key
+
+        hip_file = os.environ.get("HIPFILE", os.environ.get("HIP", ""))
+
+        label = getProperty("renderer:renderlabel")[0]
+        rendertype = getProperty("renderer:rendertype")[0]
+
+        camera = label
+
+        suffix = ".{}".format(rendertype)
+
+        if label.endswith(suffix):
+            camera = label[:-len(suffix)]
+
+        return "{}:{}:{}".format(hip_file, camera, rendertype)
+
+    def _resetAdaptiveState(self):
+        """Restore the settings changed when choosing scales so they are not
+        carried over to the next render.
+
+        """
+        if self._base_settings is not None:
+            self.res_scale, self.sample_scale, self.disable_aovs = \
+                self._base_settings
+
+        self._base_settings = None
+        self._render_start = None
+        self._render_work = None
+        self._target_work = None
+
     # =========================================================================
     # PROPERTIES
     # =========================================================================
 
+    @property
+    def adaptive_target(self):
+        """Target render time in seconds when choosing scales adaptively.
+
+        This is None when adaptive scaling is not enabled.
+
+        """
+        return self._adaptive_target
+
+    @adaptive_target.setter
+    def adaptive_target(self, adaptive_target):
+        self._adaptive_target = adaptive_target
+
+    # =========================================================================
+
     @property
     def disable_aovs(self):
         """Disable all extra image planes."""
@@ -103,6 +241,38 @@ class IpOverrides(PyFilterOperation):
 
     # =========================================================================
 
+    @property
+    def profile_file(self):
+        """The file render timings are stored in."""
+        if self._profile_file is not None:
+            return self._profile_file
+
+        return os.environ.get(
+            "HT_IP_PROFILE_FILE",
+            os.path.expanduser("~/.ht_ip_profiles.json")
+        )
+
+    @profile_file.setter
+    def profile_file(self, profile_file):
+        self._profile_file = profile_file
+
+    # =========================================================================
+
+    @property
+    def profile_key(self):
+        """The key render timings are stored under.
+
+        If None a key is built from the hip file, camera and render type.
+
+        """
+        return self._profile_key
+
+    @profile_key.setter
+    def profile_key(self, profile_key):
+        self._profile_key = profile_key
+
+    # =========================================================================
+
     @property
     def res_scale(self):
         """Amount to scale the image resolution by."""
@@ -130,10 +300,17 @@ class IpOverrides(PyFilterOperation):
     @staticmethod
     def buildArgString(res_scale=None, sample_scale=None, disable_blur=False,
                        disable_aovs=False, disable_deep=False,
-                       disable_displacement=False, disable_subd=False):
+                       disable_displacement=False, disable_subd=False,
+                       adaptive_target=None, profile_key=None):
         """Construct an argument string based on values for this filter."""
         args = []
 
+        if adaptive_target is not None:
+            args.append("-ip_adaptive {}".format(adaptive_target))
+
+        if profile_key is not None:
+            args.append('-ip_profilekey "{}"'.format(profile_key))
+
         if res_scale is not None:
             args.append("-ip_resscale {}".format(res_scale))
 
@@ -212,6 +389,30 @@ class IpOverrides(PyFilterOperation):
             help="Disable subdivision"
         )
 
+        parser.add_argument(
+            "-ip_adaptive",
+            default=None,
+            type=float,
+            action="store",
+            help="Choose resolution and sample scales to render in about "
+                 "this many seconds based on previous renders."
+        )
+
+        parser.add_argument(
+            "-ip_profilekey",
+            default=None,
+            action="store",
+            help="Key to store adaptive render timings under.  Defaults to "
+                 "the hip file, camera and render type."
+        )
+
+        parser.add_argument(
+            "-ip_profilefile",
+            default=None,
+            action="store",
+            help="File to store adaptive render timings in."
+        )
+
     # =========================================================================
     # METHODS
     # =========================================================================
@@ -219,23 +420,46 @@ class IpOverrides(PyFilterOperation):
     @logFilter
     def filterCamera(self):
         """Apply camera properties."""
-        import mantra
-
-        if self.res_scale is not None:
-            resolution = mantra.property("image:resolution")
+        if self.adaptive_target is not None:
+            self._applyAdaptiveScales()
 
-            new_res = [int(round(val * self.res_scale)) for val in resolution]
-
-            setProperty("image:resolution", new_res)
+        # The fraction of the full pixel and sample counts being rendered,
+        # after rounding.
+        work = 1.0
 
         if self.sample_scale is not None:
-            samples = mantra.property("image:samples")
+            samples = getProperty("image:samples")
 
             # Need to make sure our values are at least a minimum of 1.
             new_samples = [max(1, int(math.ceil(val * self.sample_scale))) for val in samples]
 
             setProperty("image:samples", new_samples)
 
+            work *= _getCountRatio(samples, new_samples)
+
+        # Rounding the samples up can add a lot of work so adjust the
+        # resolution to still hit the target.
+        if self._target_work is not None:
+            self.res_scale = min(
+                1.0,
+                max(
+                    _MIN_ADAPTIVE_SCALE,
+                    math.sqrt(self._target_work / work)
+                )
+            )
+
+        if self.res_scale is not None:
+            resolution = getProperty("image:resolution")
+
+            new_res = [int(round(val * self.res_scale)) for val in resolution]
+
+            setProperty("image:resolution", new_res)
+
+            work *= _getCountRatio(resolution, new_res)
+
+        if self._render_start is not None:
+            self._render_work = work
+
         # Set the blurquality values to 0 to disable blur.
         if self.disable_blur:
             setProperty("renderer:blurquality", 0)
@@ -245,11 +469,47 @@ class IpOverrides(PyFilterOperation):
         if self.disable_deep:
             setProperty("image:deepresolver", [])
 
+    @logFilter
+    def filterEndRender(self):
+        """Record the render time for adaptive scaling."""
+        start = self._render_start
+        work = self._render_work
+
+        self._resetAdaptiveState()
+
+        if start is None or work is None:
+            return
+
+        duration = time.time() - start
+
+        key = self._getProfileKey()
+
+        profiles = _loadProfiles(self.profile_file)
+
+        samples = profiles.get(key, {}).get("samples", [])
+
+        # Keep the most recent timings so the estimate follows changes to
+        # the scene.
+        samples = (samples + [[work, duration]])[-_MAX_PROFILE_SAMPLES:]
+
+        fixed, cost = fitRenderCost(samples)
+
+        profiles[key] = {
+            "cost": cost,
+            "fixed": fixed,
+            "samples": samples,
+        }
+
+        _saveProfiles(self.profile_file, profiles)
+
+        logger.info(
+            "Rendered in {:.2f}s, estimated fixed time {:.2f}s and full "
+            "sampling time {:.2f}s".format(duration, fixed, cost)
+        )
+
     @logFilter
     def filterInstance(self):
         """Modify object properties."""
-        import mantra
-
         if self.disable_displacement:
             setProperty("object:displace", [])
 
@@ -259,18 +519,17 @@ class IpOverrides(PyFilterOperation):
     @logFilter
     def filterMaterial(self):
         """Modify material properties."""
-        import mantra
-
         if self.disable_displacement:
             setProperty("object:displace", [])
 
     @logFilter
     def filterPlane(self):
         """Modify aov properties."""
-        import mantra
+        if self.adaptive_target is not None:
+            self._applyAdaptiveScales()
 
         # We can't disable the main image plane or Mantra won't render.
-        if self.disable_aovs and mantra.property("plane:variable")[0] != "Cf+Af":
+        if self.disable_aovs and getProperty("plane:variable")[0] != "Cf+Af":
             setProperty("plane:disable", 1)
 
     def processParsedArgs(self, filter_args):
@@ -287,6 +546,16 @@ class IpOverrides(PyFilterOperation):
         self.disable_displacement = filter_args.ip_disabledisplacement
         self.disable_subd = filter_args.ip_disablesubd
 
+        if filter_args.ip_adaptive is not None:
+            self.adaptive_target = filter_args.ip_adaptive
+            self.enabled = True
+
+        if filter_args.ip_profilekey is not None:
+            self.profile_key = filter_args.ip_profilekey
+
+        if filter_args.ip_profilefile is not None:
+            self.profile_file = filter_args.ip_profilefile
+
         # Only enable ourself if something is set.
         if self.res_scale or self.disable_blur or self.sample_scale \
             or self.disable_aovs or self.disable_deep:
@@ -295,9 +564,51 @@ class IpOverrides(PyFilterOperation):
 
     def shouldRun(self):
         """Only run if we are enabled AND rendering to ip."""
-        import mantra
+        return self.enabled and getProperty("image:filename")[0] == "ip"
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
+# =============================================================================
+
+def _getCountRatio(old_values, new_values):
+    """Get the ratio of the products of two lists of counts."""
+    old_count = 1.0
+    new_count = 1.0
+
+    for old_value, new_value in zip(old_values, new_values):
+        old_count *= old_value
+        new_count *= new_value
 
-        return self.enabled and mantra.property("image:filename")[0] == "ip"
+    return new_count / old_count if old_count else 1.0
+
+
+def _loadProfiles(path):
+    """Load stored render timings, keyed by profile key."""
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+
+    # No timings have been stored or the file is unreadable.
+    except (IOError, ValueError):
+        return {}
+
+
+def _saveProfiles(path, profiles):
+    """Store render timings."""
+    temp_path = "{}.{}".format(path, os.getpid())
+
+    try:
+        with open(temp_path, "w") as handle:
+            json.dump(profiles, handle, indent=4, sort_keys=True)
+
+        # Rename so other renders never read a partial file.
+        os.rename(temp_path, path)
+
+    except (IOError, OSError) as inst:
+        logger.warning("Could not save ip timings: {}".format(inst))
+
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
 # =============================================================================
 # FUNCTIONS
@@ -394,6 +705,74 @@ def buildPyFilterCommand(node):
     return cmd
 
 
+def computeAdaptiveScales(fixed, cost, target, min_scale=None):
+    """Choose resolution and sample scales to render in a target time.
+
+    The render time is modelled as fixed + cost * (res scale * sample
+    scale) ** 2, where fixed is the time which doesn't depend on the scales,
+    such as loading the scene, and cost is the sampling time of a full scale
+    render.  The reduction is split evenly between resolution and samples,
+    and neither scale is raised above 1 or lowered below min_scale, which
+    defaults to 0.1.
+
+    """
+    if min_scale is None:
+        min_scale = _MIN_ADAPTIVE_SCALE
+
+    if cost <= 0 or target >= fixed + cost:
+        return 1.0, 1.0
+
+    # The target can't be reached at any scale.
+    if target <= fixed:
+        return min_scale, min_scale
+
+    # The product of the scales which gives the target time.
+    combined = math.sqrt(float(target - fixed) / cost)
+
+    res_scale = max(min_scale, math.sqrt(combined))
+    sample_scale = min(1.0, max(min_scale, combined / res_scale))
+
+    return res_scale, sample_scale
+
+
+def fitRenderCost(samples):
+    """Estimate the fixed and full scale sampling times of a render.
+
+    samples is a list of (work, duration) pairs, where work is the fraction
+    of the full scale pixel samples that were rendered.  A least squares fit
+    of duration = fixed + cost * work is returned as (fixed, cost).
+
+    If the timings can't separate the two terms, because they were all
+    rendered with the same amount of work, all the time is assumed to be
+    sampling time.
+
+    """
+    count = len(samples)
+
+    mean_work = float(sum(work for work, _ in samples)) / count
+    mean_duration = float(sum(duration for _, duration in samples)) / count
+
+    variance = sum((work - mean_work) ** 2 for work, _ in samples)
+
+    if variance > 1e-12:
+        covariance = sum(
+            (work - mean_work) * (duration - mean_duration)
+            for work, duration in samples
+        )
+
+        cost = covariance / variance
+        fixed = mean_duration - cost * mean_work
+
+        if fixed >= 0 and cost > 0:
+            return fixed, cost
+
+    # Fit a line through the origin instead.
+    cost = sum(work * duration for work, duration in samples) / \
+        max(sum(work ** 2 for work, _ in samples), 1e-12)
+
+    return 0.0, cost
+
+
 def setMantraCommand(node):
     """Set the soho_pipecmd parameter to something that will render with our
     custom script and settings.
@@ -403,3 +782,10 @@ def setMantraCommand(node):
 
     node.parm("soho_pipecmd").set(cmd)
 
+# =============================================================================
+
+# The number of recent render timings to estimate costs from.
+_MAX_PROFILE_SAMPLES = 8
+
+# The smallest resolution or sample scale to use when rendering adaptively.
+_MIN_ADAPTIVE_SCALE = 0.1
@@ -6,9 +6,11 @@
 
 # Standard Library Imports
 from functools import wraps
+import logging
 
 # Houdini Toolbox Imports
 from ht.pyfilter.logger import logger
+from ht.pyfilter.property import getProperty
 
 # =============================================================================
 # CLASSES
@@ -86,22 +88,23 @@ def logFilter(method_or_name):
 
         @wraps(func)
         def wrapper(*args, **kwargs):
-            func_name = func.__name__
-            class_name = args[0].__class__.__name__
+            # Only build the message, which may require a property lookup,
+            # if it will be output.
+            if logger.isEnabledFor(logging.DEBUG):
+                func_name = func.__name__
+                class_name = args[0].__class__.__name__
 
-            msg = "{}.{}()".format(class_name, func_name)
+                msg = "{}.{}()".format(class_name, func_name)
 
-            if isinstance(method_or_name, str):
-                import mantra
+                if isinstance(method_or_name, str):
+                    msg = "{} ({})".format(
+                        msg,
+                        getProperty(method_or_name)[0]
+                    )
 
-                msg = "{} ({})".format(
-                    msg,
-                    mantra.property(method_or_name)[0]
-                )
+                logger.debug(msg)
 
-            logger.debug(msg)
-
-            func(*args, **kwargs)
+            return func(*args, **kwargs)
 
         return wrapper
 
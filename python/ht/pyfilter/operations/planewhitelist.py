@@ -0,0 +1,108 @@
+"""This module contains an operation to only render whitelisted image planes.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Houdini Toolbox Imports
+from ht.pyfilter.logger import logger
+from ht.pyfilter.operations.operation import PyFilterOperation, logFilter
+from ht.pyfilter.property import getProperty, setProperty
+from ht.utils.patterns import compilePattern
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+class PlaneWhitelist(PyFilterOperation):
+    """Operation to disable all image planes which are not whitelisted.
+
+    This operation creates and uses the -keepplanes arg.  The value is a
+    Houdini style pattern, eg. "N P direct_* ^direct_emission", which is
+    matched against the variable and channel name of each plane.  Planes
+    which match neither are disabled.
+
+    The primary Cf+Af plane is always kept since Mantra will not render
+    without it.
+
+    """
+
+    def __init__(self, manager):
+        super(PlaneWhitelist, self).__init__(manager)
+
+        self._pattern = None
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def pattern(self):
+        """The compiled HoudiniPattern of planes to keep."""
+        return self._pattern
+
+    @pattern.setter
+    def pattern(self, pattern):
+        self._pattern = pattern
+
+    # =========================================================================
+    # STATIC METHODS
+    # =========================================================================
+
+    @staticmethod
+    def buildArgString(planes):
+        """Construct an argument string from a list or pattern of plane
+        names.
+
+        """
+        if not isinstance(planes, str):
+            planes = " ".join(planes)
+
+        return '-keepplanes "{}"'.format(planes)
+
+    @staticmethod
+    def registerParserArgs(parser):
+        """Register interested parser args for this operation."""
+        parser.add_argument(
+            "-keepplanes",
+            default=None,
+            action="store",
+            help="Pattern of plane variables or channels to keep.  All "
+                 "other planes are disabled."
+        )
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    @logFilter("plane:variable")
+    def filterPlane(self):
+        """Disable the plane if it isn't whitelisted."""
+        variable = getProperty("plane:variable")[0]
+
+        # We can't disable the main image plane or Mantra won't render.
+        if variable == "Cf+Af":
+            return
+
+        if self.pattern.matches(variable):
+            return
+
+        channel = getProperty("plane:channel")[0]
+
+        if self.pattern.matches(channel):
+            return
+
+        logger.debug("Disabling plane {} ({})".format(channel, variable))
+
+        setProperty("plane:disable", 1)
+
+    def processParsedArgs(self, filter_args):
+        """Process any of our interested arguments if they were passed."""
+        if filter_args.keepplanes is not None:
+            self.pattern = compilePattern(filter_args.keepplanes)
+
+    def shouldRun(self):
+        """Only run if a whitelist was passed."""
+        return self.pattern is not None
@@ -7,7 +7,7 @@
 # Houdini Toolbox Imports
 from ht.pyfilter.logger import logger
 from ht.pyfilter.operations.operation import PyFilterOperation, logFilter
-from ht.pyfilter.property import setProperty
+from ht.pyfilter.property import getProperty, setProperty
 
 # =============================================================================
 # CLASSES
@@ -78,16 +78,14 @@ class SetDeepResolverPath(PyFilterOperation):
     @logFilter
     def filterCamera(self):
         """Apply camera properties."""
-        import mantra
-
-        render_type = mantra.property("renderer:rendertype")[0]
+        render_type = getProperty("renderer:rendertype")[0]
 
         if not self.all_passes and render_type != "beauty":
             logger.warning("Not a beauty render, skipping deepresolver")
             return
 
         # Look for existing args.
-        deep_args = mantra.property("image:deepresolver")
+        deep_args = getProperty("image:deepresolver")
 
         # If deep rendering is not enabled the args will be emptry so we should
         # log an error and bail out.
@@ -86,6 +86,11 @@ class SetProperties(PyFilterOperation):
         """Apply camera properties."""
         self.property_manager.setProperties("camera")
 
+    @logFilter
+    def filterEndRender(self):
+        """Clear any per render data."""
+        self.property_manager.clearIndexes()
+
     @logFilter("object:name")
     def filterInstance(self):
         """Apply object properties."""
@@ -4,9 +4,15 @@
 # IMPORTS
 # =============================================================================
 
+# Standard Library Imports
+import os
+
 # Houdini Toolbox Imports
+from ht.pyfilter.logger import logger
 from ht.pyfilter.operations.operation import PyFilterOperation, logFilter
-from ht.pyfilter.property import setProperty
+from ht.pyfilter.property import getProperty, setProperty
+from ht.pyfilter import tiles
+from ht.utils.paths import findFile
 
 # =============================================================================
 # CLASSES
@@ -15,7 +21,12 @@ from ht.pyfilter.property import setProperty
 class SetTileCallback(PyFilterOperation):
     """Operation to set a mantra tile callback.
 
-    This operation creates and uses the -tilecallback arg.
+    This operation creates and uses the -tilecallback and -tilelog args.
+
+    When -tilelog is passed the statistics of each rendered tile are
+    recorded to a CSV log, either the path passed or a path based on the
+    output image, and a heatmap of tile render times is written next to the
+    log when the render ends.
 
     """
 
@@ -26,6 +37,8 @@ class SetTileCallback(PyFilterOperation):
         # parsing args or anything like that.
         self._callback_path = None
 
+        self._tile_log = None
+
     # =========================================================================
     # PROPERTIES
     # =========================================================================
@@ -39,13 +52,35 @@ class SetTileCallback(PyFilterOperation):
     def callback_path(self, callback_path):
         self._callback_path = callback_path
 
+    @property
+    def tile_log(self):
+        """The path to record tile statistics to.
+
+        An empty string means the path is based on the output image and
+        None means tiles are not recorded.
+
+        """
+        return self._tile_log
+
+    @tile_log.setter
+    def tile_log(self, tile_log):
+        self._tile_log = tile_log
+
     # =========================================================================
     # STATIC METHODS
     # =========================================================================
 
     @staticmethod
-    def buildArgString(path):
-        return "-tilecallback {}".format(path)
+    def buildArgString(path=None, tile_log=None):
+        args = []
+
+        if path is not None:
+            args.append("-tilecallback {}".format(path))
+
+        if tile_log is not None:
+            args.append("-tilelog {}".format(tile_log))
+
+        return " ".join(args)
 
     @staticmethod
     def registerParserArgs(parser):
@@ -55,7 +90,16 @@ class SetTileCallback(PyFilterOperation):
             nargs="?",
             default=None,
             action="store",
-            help=""
+            help="Set the tile callback file."
+        )
+
+        parser.add_argument(
+            "-tilelog",
+            nargs="?",
+            default=None,
+            const="",
+            action="store",
+            help="Record tile statistics, optionally to a specific file."
         )
 
     # =========================================================================
@@ -65,14 +109,66 @@ class SetTileCallback(PyFilterOperation):
     @logFilter
     def filterCamera(self):
         """Apply camera properties."""
-        setProperty("render:tilecallback", self.callback_path)
+        setProperty("renderer:tilecallback", self.callback_path)
+
+        if self.tile_log is None:
+            return
+
+        path = self.tile_log
+
+        # Record to a file next to the output image.
+        if not path:
+            filename = getProperty("image:filename")[0]
+
+            if filename in ("ip", "md", "null:"):
+                logger.warning(
+                    "Cannot record tiles for {} renders without a "
+                    "-tilelog path".format(filename)
+                )
+
+                return
+
+            path = "{}.tiles.csv".format(os.path.splitext(filename)[0])
+
+        resolution = getProperty("image:resolution")
+
+        collector = tiles.startCollector(path, tuple(resolution[:2]))
+
+        logger.info("Recording tiles to {}".format(collector.path))
+
+    @logFilter
+    def filterEndRender(self):
+        """Write a heatmap of the recorded tiles."""
+        collector = tiles.stopCollector()
+
+        if collector is None or collector.resolution is None:
+            return
+
+        resolution, records = tiles.readTileLog(collector.path)
+
+        if not records:
+            return
+
+        heatmap = tiles.buildHeatmap(records, resolution)
+
+        path = "{}_heatmap.pgm".format(os.path.splitext(collector.path)[0])
+
+        tiles.writeHeatmapImage(path, heatmap)
+
+        logger.info("Wrote tile heatmap to {}".format(path))
 
     def processParsedArgs(self, filter_args):
         """Process any of our interested arguments if they were passed."""
         if filter_args.tilecallback is not None:
             self.callback_path = filter_args.tilecallback
 
+        if filter_args.tilelog is not None:
+            self.tile_log = filter_args.tilelog
+
+            # Use the shipped callback to record the tiles.
+            if self.callback_path is None:
+                self.callback_path = findFile("pyfilter/tileCallback.py")
+
     def shouldRun(self):
         """Only run if a callback file path is set."""
-        self.callback_path is not None
-
+        return self.callback_path is not None
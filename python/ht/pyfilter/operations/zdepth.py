@@ -7,9 +7,7 @@
 # Houdini Toolbox Imports
 from ht.pyfilter.logger import logger
 from ht.pyfilter.operations.operation import PyFilterOperation, logFilter
-from ht.pyfilter.property import Property, setProperty
-
-import mantra
+from ht.pyfilter.property import Property, getProperty, setProperty
 
 # =============================================================================
 # CLASSES
@@ -70,7 +68,7 @@ class ZDepthPass(PyFilterOperation):
 
         print matte, phantom, surface
 
-        surface = mantra.property("object:surface")[0]
+        surface = getProperty("object:surface")[0]
 
         setProperty("object:overridedetail", True)
 
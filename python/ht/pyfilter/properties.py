@@ -6,14 +6,20 @@
 
 # Standard Library Imports
 from collections import Iterable
+import cPickle
+import getpass
+import hashlib
 import json
+import os
+import stat
+import tempfile
 
 # Houdini Toolbox Imports
 from ht.pyfilter.logger import logger
+from ht.pyfilter.property import getProperty, setProperty
 import ht.utils
-
-# Houdini Imports
-import hou
+from ht.utils.paths import findFile
+from ht.utils.patterns import compilePattern, patternMatch
 
 # =============================================================================
 # CLASSES
@@ -27,16 +33,35 @@ class PropertySetterManager(object):
     def __init__(self):
         self._properties = {}
 
+        # PropertySetterIndex objects for each stage, built on demand.
+        self._indexes = {}
+
+        # The render type of the current render.
+        self._rendertype = None
+
     # =========================================================================
     # NON-PUBLIC METHODS
     # =========================================================================
 
-    def _loadFromData(self, data):
-        """Build PropertySetter objects from data."""
+    def _addProperties(self, properties):
+        """Add built PropertySetter objects to the existing ones."""
+        # The new properties will need to be indexed.
+        self.clearIndexes()
+
+        for stage_name, setters in properties.iteritems():
+            self.properties.setdefault(stage_name, []).extend(setters)
+
+    def _buildProperties(self, data):
+        """Build a dictionary of stage names to lists of PropertySetter
+        objects from data.
+
+        """
+        stages = {}
+
         # Process each filter stage name and it's data.
         for stage_name, stage_data in data.iteritems():
             # A list of properties for this stage.
-            properties = self.properties.setdefault(stage_name, [])
+            properties = stages.setdefault(stage_name, [])
 
             # Check if the stage should be disabled.
             if "disabled" in stage_data:
@@ -83,6 +108,27 @@ class PropertySetterManager(object):
                         properties, stage_name, property_name, property_block
                     )
 
+        return stages
+
+    def _getIndex(self, stage):
+        """Get the PropertySetterIndex for a stage."""
+        index = self._indexes.get(stage)
+
+        if index is None:
+            # The render type does not change during a render so only look
+            # it up once.
+            if self._rendertype is None:
+                self._rendertype = getProperty("renderer:rendertype")[0]
+
+            index = PropertySetterIndex(
+                self.properties.get(stage, ()),
+                self._rendertype
+            )
+
+            self._indexes[stage] = index
+
+        return index
+
     def _processBlock(self, properties, stage_name, name, block):
         """Process a data block to add properties."""
         # If we want to set the same property with different settings multiple
@@ -117,30 +163,133 @@ class PropertySetterManager(object):
     # METHODS
     # =========================================================================
 
-    def loadFromFile(self, filepath):
-        """Load properties from a file."""
-        logger.debug("Reading properties from {}".format(filepath))
+    def clearIndexes(self):
+        """Clear any indexed properties and the cached render type.
+
+        This should be called when a render ends.
+
+        """
+        self._indexes.clear()
+        self._rendertype = None
+
+    def loadFromFile(self, filepath, use_cache=True):
+        """Load properties from a file.
+
+        The built properties are cached on disk so later loads of an
+        unchanged file do not need to parse it or find any files again.
+
+        """
+        properties = None
 
-        # Load json data from the file.
-        with open(filepath) as f:
-            data = json.load(f, object_hook=ht.utils.convertFromUnicode)
+        if use_cache:
+            properties = _loadCachedProperties(filepath)
 
-        self._loadFromData(data)
+        if properties is None:
+            logger.debug("Reading properties from {}".format(filepath))
+
+            with open(filepath, "rb") as handle:
+                contents = handle.read()
+
+            # Load json data from the file.
+            data = json.loads(
+                contents,
+                object_hook=ht.utils.convertUnicodeObject
+            )
+
+            properties = self._buildProperties(data)
+
+            if use_cache:
+                _saveCachedProperties(filepath, contents, properties)
+
+        self._addProperties(properties)
 
     def parseFromString(self, property_string):
         """Load properties from a string."""
         data = json.loads(
             property_string,
-            object_hook=ht.utils.convertFromUnicode
+            object_hook=ht.utils.convertUnicodeObject
         )
 
-        self._loadFromData(data)
+        self._addProperties(self._buildProperties(data))
 
     def setProperties(self, stage):
         """Apply properties."""
-        if stage in self.properties:
-            for prop in self.properties[stage]:
-                prop.setProperty()
+        if stage not in self.properties:
+            return
+
+        for prop in self._getIndex(stage).getPropertySetters():
+            prop.applyProperty()
+
+# =============================================================================
+
+class PropertySetterIndex(object):
+    """Lookup of the PropertySetters of a stage which apply to the item
+    currently being filtered.
+
+    Setters which do not apply to the render type, or are not enabled, are
+    discarded when the index is built.  Masks of masked setters are split into
+    their individual patterns which are stored in an exact name lookup, a
+    prefix trie for patterns like 'name*' and a list of remaining patterns
+    which have to be matched individually.
+
+    """
+
+    def __init__(self, setters, rendertype):
+        # (order, setter) tuples for setters without masks.
+        self._unmasked = []
+
+        # Lookups of masked setters, keyed by the mask property name.
+        self._masked = {}
+
+        # The setters in the order they should be applied.
+        self._setters = []
+
+        for setter in setters:
+            if not setter.enabled:
+                continue
+
+            if not setter.matchesRendertype(rendertype):
+                continue
+
+            order = len(self._setters)
+            self._setters.append(setter)
+
+            if isinstance(setter, MaskedPropertySetter):
+                lookup = self._masked.setdefault(
+                    setter.mask_property_name,
+                    _MaskLookup()
+                )
+
+                lookup.add(order, setter.mask)
+
+            else:
+                self._unmasked.append(order)
+
+    def __repr__(self):
+        return "<PropertySetterIndex ({} setters)>".format(len(self._setters))
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def getPropertySetters(self):
+        """Get the PropertySetters which apply to the item currently being
+        filtered, in the order they should be applied.
+
+        """
+        # Nothing is masked so everything applies.
+        if not self._masked:
+            return self._setters
+
+        orders = set(self._unmasked)
+
+        for mask_property_name, lookup in self._masked.iteritems():
+            # Get the name of the item that is currently being filtered.
+            filtered_item = getProperty(mask_property_name)[0]
+
+            orders.update(lookup.match(filtered_item))
+
+        return [self._setters[order] for order in sorted(orders)]
 
 # =============================================================================
 
@@ -209,7 +358,13 @@ class PropertySetter(object):
         # If the value is actually a relative file, search for it in the
         # Houdini path.
         if self.find_file:
-            self.value = hou.findFile(self.value)
+            path = findFile(self.value)
+
+            if path is None:
+                logger.warning("Could not find file {}".format(self.value))
+
+            else:
+                self.value = path
 
         # Object is a list (possibly numbers or strings or both).
         if isinstance(self.value, list):
@@ -280,29 +435,42 @@ class PropertySetter(object):
     # METHODS
     # =========================================================================
 
+    def applyProperty(self):
+        """Set the property to the value without checking whether it should
+        be applied.
+
+        """
+        logger.debug(
+            "Setting property '{}' to {}".format(self.name, self.value)
+        )
+
+        # Update the property value.
+        setProperty(self.name, self.value)
+
+    def matchesRendertype(self, rendertype):
+        """Check whether the property should be applied for a render type."""
+        # The property is not being applied to a specific render type.
+        if self.rendertype is None:
+            return True
+
+        return patternMatch(self.rendertype, rendertype)
+
     def setProperty(self):
         """Set the property to the value."""
         # Don't do anything if the property isn't enabled.
         if not self.enabled:
             return
 
-        import mantra
-
         # Is this property being applied to a specific render type.
         if self.rendertype is not None:
             # Get the rendertype for the current pass.
-            rendertype = mantra.property("renderer:rendertype")[0]
+            rendertype = getProperty("renderer:rendertype")[0]
 
             # If the type pattern doesn't match, abort.
-            if not hou.patternMatch(self.rendertype, rendertype):
+            if not self.matchesRendertype(rendertype):
                 return
 
-        logger.debug(
-            "Setting property '{}' to {}".format(self.name, self.value)
-        )
-
-        # Update the property value.
-        mantra.setproperty(self.name, self.value)
+        self.applyProperty()
 
 # =============================================================================
 
@@ -361,22 +529,87 @@ class MaskedPropertySetter(PropertySetter):
 
     def setProperty(self):
         """Set the property under mantra."""
-        import mantra
-
         # Is this property being applied using a name mask.
         if self.mask is not None:
             # Get the name of the item that is currently being filtered.
-            filtered_item = mantra.property(self.mask_property_name)[0]
+            filtered_item = getProperty(self.mask_property_name)[0]
 
             # If the mask pattern doesn't match, abort.
-            if not hou.patternMatch(self.mask, filtered_item):
+            if not patternMatch(self.mask, filtered_item):
                 return
 
         # Call the super class function to set the property.
         super(MaskedPropertySetter, self).setProperty()
 
 # =============================================================================
-# FUNCTIONS
+
+class _MaskLookup(object):
+    """Lookup of mask patterns to the orders of the setters using them."""
+
+    def __init__(self):
+        # Item names to orders for patterns without wildcards.
+        self._exact = {}
+
+        # Trie of characters for patterns of the form 'prefix*'.  The orders
+        # for a prefix are stored under the None key of its node.
+        self._trie = {}
+
+        # (order, HoudiniPattern) tuples for masks which need full pattern
+        # matching.
+        self._patterns = []
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def add(self, order, mask):
+        """Add a mask for a setter order."""
+        tokens = mask.split()
+
+        # Exclusions and complex wildcards require the full mask to be
+        # matched.
+        if not tokens or not all(_isSimplePattern(token) for token in tokens):
+            self._patterns.append((order, compilePattern(mask)))
+            return
+
+        for token in tokens:
+            if token.endswith("*"):
+                node = self._trie
+
+                for char in token[:-1]:
+                    node = node.setdefault(char, {})
+
+                node.setdefault(None, []).append(order)
+
+            else:
+                self._exact.setdefault(token, []).append(order)
+
+    def match(self, name):
+        """Get a list of the orders whose masks match a name."""
+        orders = list(self._exact.get(name, ()))
+
+        # Walk the trie collecting the orders of any matching prefixes.
+        node = self._trie
+
+        for char in name:
+            orders.extend(node.get(None, ()))
+
+            node = node.get(char)
+
+            if node is None:
+                break
+
+        else:
+            orders.extend(node.get(None, ()))
+
+        for order, pattern in self._patterns:
+            if pattern.matches(name):
+                orders.append(order)
+
+        return orders
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
 # =============================================================================
 
 def _createPropertySetter(stage_name, property_name, property_block):
@@ -413,3 +646,171 @@ def _createPropertySetter(stage_name, property_name, property_block):
     # Generic property setter.
     return PropertySetter(property_name, property_block)
 
+
+def _getCachePath(filepath):
+    """Get the path of the cache file for a property file.
+
+    Cache files are stored in the directory set by HT_PYFILTER_CACHE_DIR, or
+    a per-user directory in the system temp directory if it is not set.
+
+    """
+    cache_dir = os.environ.get("HT_PYFILTER_CACHE_DIR")
+
+    if not cache_dir:
+        cache_dir = os.path.join(
+            tempfile.gettempdir(),
+            "ht_pyfilter_{}".format(getpass.getuser())
+        )
+
+    name = hashlib.sha1(os.path.abspath(filepath)).hexdigest()
+
+    return os.path.join(cache_dir, "{}.pickle".format(name))
+
+
+def _isSimplePattern(pattern):
+    """Check if a pattern is a plain name or a plain name followed by '*'."""
+    if pattern.startswith("^"):
+        return False
+
+    if pattern.endswith("*"):
+        pattern = pattern[:-1]
+
+    return not any(char in pattern for char in "*?[]")
+
+
+def _isPrivatePath(path, file_type):
+    """Check that a path is of a type, owned by the current user and not
+    accessible by anyone else.
+
+    Symbolic links are not followed.
+
+    """
+    try:
+        info = os.lstat(path)
+
+    except OSError:
+        return False
+
+    if stat.S_IFMT(info.st_mode) != file_type:
+        return False
+
+    # Ownership and permissions can only be checked on Unix.
+    if not hasattr(os, "getuid"):
+        return True
+
+    return info.st_uid == os.getuid() and not info.st_mode & 0o077
+
+
+def _loadCachedProperties(filepath):
+    """Load the cached properties for a property file.
+
+    The cache is used if the file has the same modification time as when it
+    was cached or, if the time differs, the same contents.  Returns None if
+    there is no valid cache.
+
+    Caches are unpickled so they are only read if they and the cache
+    directory are private to the current user.
+
+    """
+    cache_path = _getCachePath(filepath)
+
+    if not _isPrivatePath(os.path.dirname(cache_path), stat.S_IFDIR) or \
+       not _isPrivatePath(cache_path, stat.S_IFREG):
+        return None
+
+    try:
+        with open(cache_path, "rb") as handle:
+            cached = cPickle.load(handle)
+
+    # Missing or unreadable caches are rebuilt.
+    except Exception:
+        return None
+
+    if cached.get("version") != _CACHE_VERSION:
+        return None
+
+    # Found files depend on the Houdini path.
+    if cached.get("houdini_path") != os.environ.get("HOUDINI_PATH"):
+        return None
+
+    mtime = os.path.getmtime(filepath)
+
+    if cached.get("mtime") != mtime:
+        with open(filepath, "rb") as handle:
+            file_hash = hashlib.sha1(handle.read()).hexdigest()
+
+        if cached.get("hash") != file_hash:
+            return None
+
+        # The file was touched but not changed so just update the time.
+        cached["mtime"] = mtime
+
+        _writeCache(cache_path, cached)
+
+    logger.debug("Loaded cached properties for {}".format(filepath))
+
+    return cached["properties"]
+
+
+def _saveCachedProperties(filepath, contents, properties):
+    """Cache the properties built from a property file."""
+    cached = {
+        "version": _CACHE_VERSION,
+        "houdini_path": os.environ.get("HOUDINI_PATH"),
+        "mtime": os.path.getmtime(filepath),
+        "hash": hashlib.sha1(contents).hexdigest(),
+        "properties": properties,
+    }
+
+    _writeCache(_getCachePath(filepath), cached)
+
+
+def _writeCache(cache_path, cached):
+    """Write cache data to a file.
+
+    The data is written to a temporary file which is then renamed so other
+    processes never read a partially written cache.  The cache directory and
+    files are only accessible by the current user.  Failures are logged and
+    otherwise ignored.
+
+    """
+    cache_dir = os.path.dirname(cache_path)
+    temp_path = "{}.{}".format(cache_path, os.getpid())
+
+    try:
+        if not os.path.lexists(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+
+        # Don't write into a directory someone else could read or replace
+        # files in.
+        if not _isPrivatePath(cache_dir, stat.S_IFDIR):
+            logger.warning(
+                "Not caching properties: {} is not a private directory".format(
+                    cache_dir
+                )
+            )
+
+            return
+
+        descriptor = os.open(
+            temp_path,
+            os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+            0o600
+        )
+
+        with os.fdopen(descriptor, "wb") as handle:
+            cPickle.dump(cached, handle, cPickle.HIGHEST_PROTOCOL)
+
+        os.rename(temp_path, cache_path)
+
+    except (IOError, OSError) as inst:
+        logger.debug("Could not write cache {}: {}".format(cache_path, inst))
+
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+# =============================================================================
+
+# Version of the cached property data.  This should be incremented when the
+# PropertySetter classes change.
+_CACHE_VERSION = 1
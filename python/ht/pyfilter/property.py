@@ -1,6 +1,11 @@
 """This module defines an object interface to get and set Mantra render
 properties.
 
+Property reads and writes can be batched using a snapshot.  While a snapshot
+is active property values are only read from Mantra once and parsed values
+are memoized.  Values that are set are stored in the snapshot and only
+written back to Mantra, once each, when the snapshot ends.
+
 """
 
 # =============================================================================
@@ -9,6 +14,7 @@ properties.
 
 # Standard Library Imports
 from collections import Iterable
+import contextlib
 
 # =============================================================================
 # CLASSES
@@ -21,10 +27,10 @@ class Property(object):
     """
 
     def __init__(self, name):
-    	self._name = name
-    	self._value = None
+        self._name = name
+        self._value = None
 
-    	self._initData()
+        self._initData()
 
     # =========================================================================
     # NON-PUBLIC METHODS
@@ -32,26 +38,11 @@ class Property(object):
 
     def _initData(self):
         """Init internal data."""
-        import mantra
-
-    	values = mantra.property(self.name)
-
-    	if len(values) == 1:
-    	    value = values[0]
-
-            if isinstance(value, str):
-                if len(value.split()) > 2:
-                    split_vals = value.split()
+        if _SNAPSHOT is not None:
+            self._value = _SNAPSHOT.getParsedValue(self.name)
 
-                    value = dict(zip(*[iter(split_vals)]*2))
-
-                else:
-                    value = _parseString(value)
-
-    	else:
-    	    value = values
-
-    	self._value = value
+        else:
+            self._value = _parseValues(getProperty(self.name))
 
     # =========================================================================
     # PROPERTIES
@@ -69,22 +60,98 @@ class Property(object):
 
     @value.setter
     def value(self, value):
+        setProperty(self.name, value)
+
+        self._initData()
+
+# =============================================================================
+
+class PropertySnapshot(object):
+    """A cache of Mantra property values and pending changes.
+
+    """
+
+    def __init__(self):
+        # Raw property values, keyed by property name.
+        self._values = {}
+
+        # Parsed property values, keyed by property name.
+        self._parsed = {}
+
+        # Values as they were originally read from Mantra.
+        self._original = {}
+
+        # Names of properties which have been set, in the order they were
+        # first set.
+        self._changed = []
+
+    def __repr__(self):
+        return "<PropertySnapshot ({} changed)>".format(len(self._changed))
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def flush(self):
+        """Write any changed values back to Mantra."""
         import mantra
 
-        if value is None:
-            value = []
+        for name in self._changed:
+            values = self._values[name]
 
-        if not isinstance(value, Iterable):
-            value = [value]
+            # Skip properties which have been set back to their original
+            # value.
+            if name in self._original and self._original[name] == values:
+                continue
 
-        mantra.setproperty(self.name, value)
+            mantra.setproperty(name, values)
 
-        self._initData()
+        self._changed = []
+
+    def getParsedValue(self, name):
+        """Get the parsed value of a property."""
+        if name not in self._parsed:
+            self._parsed[name] = _parseValues(self.getValues(name))
+
+        return self._parsed[name]
+
+    def getValues(self, name):
+        """Get the raw list of values for a property."""
+        if name not in self._values:
+            import mantra
+
+            values = list(mantra.property(name))
+
+            self._values[name] = values
+            self._original[name] = list(values)
+
+        return list(self._values[name])
+
+    def setValues(self, name, values):
+        """Set the raw list of values for a property."""
+        self._values[name] = list(values)
+
+        # Remove any stale parsed value.
+        self._parsed.pop(name, None)
+
+        if name not in self._changed:
+            self._changed.append(name)
 
 # =============================================================================
 # NON-PUBLIC FUNCTIONS
 # =============================================================================
 
+def _normalizeValue(value):
+    """Convert a value being set into a list of values."""
+    if value is None:
+        return []
+
+    if isinstance(value, str) or not isinstance(value, Iterable):
+        return [value]
+
+    return list(value)
+
+
 def _parseString(value):
     """Process a string value looking for boolean values."""
     if value.lower() == "false":
@@ -95,15 +162,112 @@ def _parseString(value):
 
     return value
 
+
+def _parseValues(values):
+    """Convert a list of raw property values into a more useful value."""
+    if len(values) == 1:
+        value = values[0]
+
+        if isinstance(value, str):
+            if len(value.split()) > 2:
+                split_vals = value.split()
+
+                value = dict(zip(*[iter(split_vals)]*2))
+
+            else:
+                value = _parseString(value)
+
+    else:
+        value = values
+
+    return value
+
 # =============================================================================
 # FUNCTIONS
 # =============================================================================
 
+def beginSnapshot():
+    """Start batching property reads and writes.
+
+    Returns False if a snapshot was already active.
+
+    """
+    global _SNAPSHOT
+
+    if _SNAPSHOT is not None:
+        return False
+
+    _SNAPSHOT = PropertySnapshot()
+
+    return True
+
+
+def endSnapshot():
+    """Write any changed values and stop batching property reads and
+    writes.
+
+    """
+    global _SNAPSHOT
+
+    snapshot = _SNAPSHOT
+
+    if snapshot is None:
+        return
+
+    _SNAPSHOT = None
+
+    snapshot.flush()
+
+
+def getProperty(name):
+    """Get the raw list of values for a property.
+
+    This is a wrapper around mantra.property() which uses the current
+    snapshot if there is one.
+
+    """
+    if _SNAPSHOT is not None:
+        return _SNAPSHOT.getValues(name)
+
+    import mantra
+
+    return mantra.property(name)
+
+
+@contextlib.contextmanager
+def propertySnapshot():
+    """Context manager to batch property reads and writes.
+
+    If a snapshot is already active it is used and left active.
+
+    """
+    started = beginSnapshot()
+
+    try:
+        yield _SNAPSHOT
+
+    finally:
+        if started:
+            endSnapshot()
+
+
 def setProperty(name, value):
     """Set a property to a value.
 
-    This is a wrapper around the Property.value setter.
+    If there is a current snapshot the value will be written when the
+    snapshot ends.
 
     """
-    Property(name).value = value
+    values = _normalizeValue(value)
+
+    if _SNAPSHOT is not None:
+        _SNAPSHOT.setValues(name, values)
+
+    else:
+        import mantra
+
+        mantra.setproperty(name, values)
+
+# =============================================================================
 
+_SNAPSHOT = None
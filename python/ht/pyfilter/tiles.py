@@ -0,0 +1,293 @@
+"""This module contains functions for recording and aggregating Mantra tile
+render statistics.
+
+During a render the pyfilter/tileCallback.py tile callback calls recordTile()
+after each tile is rendered.  The tile's coordinates, render times and
+memory use are read from the tile: properties and streamed to a CSV log.
+After the render the log can be aggregated into a heatmap of render cost per
+image region.
+
+The log to write to is set by startCollector(), which is called by the
+SetTileCallback operation, or by the HT_TILE_LOG environment variable.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Standard Library Imports
+from collections import namedtuple
+import os
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+# Statistics for a rendered tile.  Coordinates are inclusive pixel bounds
+# with y0 at the bottom of the image.
+TileRecord = namedtuple(
+    "TileRecord",
+    (
+        "tile",
+        "x0",
+        "x1",
+        "y0",
+        "y1",
+        "laptime",
+        "totaltime",
+        "memory"
+    )
+)
+
+# =============================================================================
+
+class TileCollector(object):
+    """Stream tile records to a CSV log file.
+
+    """
+
+    def __init__(self, path, resolution=None):
+        self._path = path
+        self._resolution = resolution
+
+        self._handle = open(path, "w")
+
+        if resolution is not None:
+            self._handle.write("# resolution {} {}\n".format(*resolution))
+
+        self._handle.write(",".join(TileRecord._fields) + "\n")
+
+    def __repr__(self):
+        return "<TileCollector {}>".format(self.path)
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def closed(self):
+        """Whether the log file has been closed."""
+        return self._handle.closed
+
+    @property
+    def path(self):
+        """The path of the log file."""
+        return self._path
+
+    @property
+    def resolution(self):
+        """The (width, height) of the image being rendered, or None."""
+        return self._resolution
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def addRecord(self, record):
+        """Write a record to the log."""
+        self._handle.write(",".join(str(value) for value in record) + "\n")
+
+        # Flush so the log is usable even if the render does not finish.
+        self._handle.flush()
+
+    def close(self):
+        """Close the log file."""
+        self._handle.close()
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
+# =============================================================================
+
+def _getValue(name, index=0, default=0):
+    """Get a value of a Mantra property, or a default if it is not set."""
+    import mantra
+
+    values = mantra.property(name)
+
+    if len(values) > index:
+        return values[index]
+
+    return default
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def buildHeatmap(records, resolution, cell_size=16, field="laptime"):
+    """Aggregate tile records into a heatmap.
+
+    The value of a field of each tile is spread evenly over the pixels of the
+    tile and summed into square cells of cell_size pixels.  Returns a list of
+    rows of cell values, with the first row at the top of the image.
+
+    """
+    width, height = resolution
+
+    columns = (width + cell_size - 1) // cell_size
+    rows = (height + cell_size - 1) // cell_size
+
+    heatmap = [[0.0] * columns for _ in range(rows)]
+
+    for record in records:
+        x0 = max(int(record.x0), 0)
+        x1 = min(int(record.x1), width - 1)
+        y0 = max(int(record.y0), 0)
+        y1 = min(int(record.y1), height - 1)
+
+        if x1 < x0 or y1 < y0:
+            continue
+
+        # The value for each pixel of the tile.
+        density = float(getattr(record, field)) / \
+            ((x1 - x0 + 1) * (y1 - y0 + 1))
+
+        for row in range(y0 // cell_size, y1 // cell_size + 1):
+            # Number of pixel rows of the tile in this cell.
+            overlap_y = min(y1, (row + 1) * cell_size - 1) - \
+                max(y0, row * cell_size) + 1
+
+            cells = heatmap[rows - 1 - row]
+
+            for column in range(x0 // cell_size, x1 // cell_size + 1):
+                overlap_x = min(x1, (column + 1) * cell_size - 1) - \
+                    max(x0, column * cell_size) + 1
+
+                cells[column] += density * overlap_x * overlap_y
+
+    return heatmap
+
+
+def getCollector():
+    """Get the active TileCollector.
+
+    If no collector has been started but the HT_TILE_LOG environment
+    variable is set a collector writing to that path is started.
+
+    """
+    global _COLLECTOR
+
+    if _COLLECTOR is None:
+        path = os.environ.get("HT_TILE_LOG")
+
+        if path:
+            _COLLECTOR = TileCollector(path)
+
+    return _COLLECTOR
+
+
+def readTileLog(path):
+    """Read a tile log.
+
+    Returns the (width, height) resolution, or None if it was not recorded,
+    and a list of TileRecords.
+
+    """
+    resolution = None
+    records = []
+
+    with open(path) as handle:
+        for line in handle:
+            line = line.strip()
+
+            if not line:
+                continue
+
+            if line.startswith("#"):
+                tokens = line[1:].split()
+
+                if tokens[0] == "resolution":
+                    resolution = (int(tokens[1]), int(tokens[2]))
+
+                continue
+
+            values = line.split(",")
+
+            # Skip the header.
+            if values[0] == TileRecord._fields[0]:
+                continue
+
+            records.append(
+                TileRecord(*[float(value) for value in values])
+            )
+
+    return resolution, records
+
+
+def recordTile():
+    """Record the statistics of the tile that was just rendered.
+
+    This should be called from a Mantra tile callback.
+
+    """
+    collector = getCollector()
+
+    if collector is None or collector.closed:
+        return
+
+    coords = [_getValue("tile:coords", index) for index in range(4)]
+
+    collector.addRecord(
+        TileRecord(
+            _getValue("tile:ncomplete"),
+            coords[0],
+            coords[1],
+            coords[2],
+            coords[3],
+            _getValue("tile:laptime"),
+            _getValue("tile:totaltime"),
+            _getValue("tile:memory")
+        )
+    )
+
+
+def startCollector(path, resolution=None):
+    """Start recording tiles to a log file."""
+    global _COLLECTOR
+
+    stopCollector()
+
+    _COLLECTOR = TileCollector(path, resolution)
+
+    return _COLLECTOR
+
+
+def stopCollector():
+    """Stop recording tiles.
+
+    Returns the stopped TileCollector, or None if there was not one.
+
+    """
+    global _COLLECTOR
+
+    collector = _COLLECTOR
+
+    if collector is not None:
+        collector.close()
+
+    _COLLECTOR = None
+
+    return collector
+
+
+def writeHeatmapImage(path, heatmap):
+    """Write a heatmap as a greyscale PGM image.
+
+    Values are scaled so the largest value is white.
+
+    """
+    maximum = max(max(row) for row in heatmap) or 1.0
+
+    with open(path, "wb") as handle:
+        handle.write(
+            "P5\n{} {}\n255\n".format(len(heatmap[0]), len(heatmap))
+        )
+
+        for row in heatmap:
+            handle.write(
+                bytearray(int(round(value / maximum * 255)) for value in row)
+            )
+
+# =============================================================================
+
+_COLLECTOR = None
@@ -1,6 +1,16 @@
 """This module contains classes to define AOVs and groups of AOVs."""
 
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Standard Library Imports
+from collections import OrderedDict
 import copy
+import time
+
+# Houdini Toolbox Imports
+from ht.sohohooks.manager import getManager
 
 # =============================================================================
 # GLOBALS
@@ -69,7 +79,7 @@ class AOV(object):
     # NON-PUBLIC METHODS
     # =========================================================================
 
-    def _lightExportPlanes(self, data, wrangler, cam, now):
+    def _lightExportPlanes(self, data, cam, now, light_cache, plane_writer):
         """Handle exporting the image planes based on their export settings."""
         import soho
 
@@ -78,8 +88,8 @@ class AOV(object):
         # Handle any light exporting.
         if self.lightexport is not None:
             # Get a list of lights matching our mask and selection.
-            lights = cam.objectList(
-                "objlist:light",
+            lights = light_cache.getLights(
+                cam,
                 now,
                 self.lightexport_scope,
                 self.lightexport_select
@@ -88,25 +98,14 @@ class AOV(object):
             if self.lightexport == "per-light":
                 # Process each light.
                 for light in lights:
-                    # Try and find the suffix using the 'vm_export_suffix'
-                    # parameter.  If it doesn't exist, use an emptry string.
-                    suffix = light.getDefaultedString(
-                        "vm_export_suffix", now, ['']
-                    )[0]
-
-                    prefix = []
-
-                    # Look for the prefix parameter.  If it doesn't exist, use
-                    # the light's name and replace the '/' with '_'.  The
-                    # default value of 'vm_export_prefix' is usually $OS.
-                    if not light.evalString("vm_export_prefix", now, prefix):
-                        prefix = [light.getName()[1:].replace('/', '_')]
+                    suffix = light.suffix
+                    prefix = light.prefix
 
                     # If there is a prefix we construct the channel name using
                     # it and the suffix.
-                    if prefix:
+                    if prefix is not None:
                         channel = "{}_{}{}".format(
-                            prefix[0],
+                            prefix,
                             base_channel,
                             suffix
                         )
@@ -123,14 +122,14 @@ class AOV(object):
                         channel = base_channel
 
                     data["channel"] = channel
-                    data["lightexport"] = light.getName()
+                    data["lightexport"] = light.name
 
-                    # Write this light export to the ifd.
-                    self.writeDataToIfd(data, wrangler, cam, now)
+                    # Add this light export.
+                    plane_writer.addPlane(data)
 
             elif self.lightexport == "single":
                 # Take all the light names and join them together.
-                lightexport = ' '.join([light.getName() for light in lights])
+                lightexport = ' '.join([light.name for light in lights])
 
                 # If there are no lights, we can't pass in an empty string
                 # since then mantra will think that light exports are
@@ -141,8 +140,8 @@ class AOV(object):
 
                 data["lightexport"] = lightexport
 
-                # Write the combined light export to the ifd.
-                self.writeDataToIfd(data, wrangler, cam, now)
+                # Add the combined light export.
+                plane_writer.addPlane(data)
 
             elif self.lightexport == "per-category":
                 # A mapping between category names and their member lights.
@@ -150,22 +149,12 @@ class AOV(object):
 
                 # Process each selected light.
                 for light in lights:
-                    # Get the category for the light.
-                    categories = []
-                    light.evalString("categories", now, categories)
+                    categories = light.categories
 
                     # Light doesn't have a 'categories' parameter.
-                    if not categories:
+                    if categories is None:
                         continue
 
-                    # Get the raw string.
-                    categories = categories[0]
-
-                    # Since the categories value can be space or comma
-                    # separated we replace the commas with spaces then split.
-                    categories = categories.replace(',', ' ')
-                    categories = categories.split()
-
                     # If the categories list was empty, put the light in a fake
                     # category.
                     if not categories:
@@ -184,7 +173,7 @@ class AOV(object):
                     # Construct the export string to contain all the member
                     # lights.
                     lightexport = ' '.join(
-                        [light.getName() for light in lights]
+                        [light.name for light in lights]
                     )
 
                     data["lightexport"] = lightexport
@@ -197,12 +186,12 @@ class AOV(object):
                     else:
                         data["channel"] = base_channel
 
-                    # Write the per-category light export to the ifd.
-                    self.writeDataToIfd(data, wrangler, cam, now)
+                    # Add the per-category light export.
+                    plane_writer.addPlane(data)
 
         else:
-            # Write a normal AOV definition.
-            self.writeDataToIfd(data, wrangler, cam, now)
+            # Add a normal AOV definition.
+            plane_writer.addPlane(data)
 
     def _updateData(self, data):
         """Update internal data with new data."""
@@ -427,52 +416,25 @@ class AOV(object):
     @staticmethod
     def writeDataToIfd(data, wrangler, cam, now):
         """Write AOV data to the ifd."""
-        import IFDapi
+        timing = getManager().timing
 
-        # Call the 'pre_defplane' hook.  If the function returns True,
-        # return.
-        if _callPreDefPlane(data, wrangler, cam, now):
-            return
+        if timing is None:
+            _writeDataToIfd(data, wrangler, cam, now)
 
-        # Start of plane block in IFD.
-        IFDapi.ray_start("plane")
-
-        # Primary block information.
-        IFDapi.ray_property("plane", "variable", [data["variable"]])
-        IFDapi.ray_property("plane", "vextype", [data["vextype"]])
-        IFDapi.ray_property("plane", "channel", [data["channel"]])
-
-        if "quantize" in data:
-            IFDapi.ray_property("plane", "quantize", [data["quantize"]])
-
-        # Optional AOV information.
-        if "planefile" in data:
-            planefile = data["planefile"]
-
-            if planefile is not None:
-                IFDapi.ray_property("plane", "planefile", [planefile])
-
-        if "lightexport" in data:
-            IFDapi.ray_property("plane", "lightexport", [data["lightexport"]])
-
-        if "pfilter" in data:
-            IFDapi.ray_property("plane", "pfilter", [data["pfilter"]])
+            return
 
-        if "sfilter" in data:
-            IFDapi.ray_property("plane", "sfilter", [data["sfilter"]])
+        key = ("aov", data["variable"])
 
-        if "component" in data:
-            IFDapi.ray_property("plane", "component", [data["component"]])
+        if data.get("lightexport"):
+            key += (data["lightexport"],)
 
-        if "exclude_from_dcm" in data:
-            IFDapi.ray_property("plane", "excludedcm", [True])
+        start = time.time()
 
-        # Call the 'post_defplane' hook.
-        if _callPostDefPlane(data, wrangler, cam, now):
-            return
+        try:
+            _writeDataToIfd(data, wrangler, cam, now)
 
-        # End the plane definition block.
-        IFDapi.ray_end()
+        finally:
+            timing.addTime(key, time.time() - start)
 
     # =========================================================================
     # METHODS
@@ -526,10 +488,26 @@ class AOV(object):
 
     # =========================================================================
 
-    def writeToIfd(self, wrangler, cam, now):
-        """Output the AOV."""
+    def writeToIfd(self, wrangler, cam, now, light_cache=None,
+                   plane_writer=None):
+        """Output the AOV.
+
+        A LightExportCache can be passed to share light information between
+        AOVs being written to the same IFD.  If a PlaneWriter is passed the
+        planes are added to it to be written later, otherwise they are
+        written immediately.
+
+        """
         import soho
 
+        if light_cache is None:
+            light_cache = LightExportCache()
+
+        write_planes = plane_writer is None
+
+        if write_planes:
+            plane_writer = PlaneWriter()
+
         # The base data to pass along.
         data = self.getData()
 
@@ -566,13 +544,28 @@ class AOV(object):
                 data["channel"] = "{}_{}".format(channel, component)
                 data["component"] = component
 
-                self._lightExportPlanes(data, wrangler, cam, now)
+                self._lightExportPlanes(
+                    data,
+                    cam,
+                    now,
+                    light_cache,
+                    plane_writer
+                )
 
         else:
             # Update the data with the channel.
             data["channel"] = channel
 
-            self._lightExportPlanes(data, wrangler, cam, now)
+            self._lightExportPlanes(
+                data,
+                cam,
+                now,
+                light_cache,
+                plane_writer
+            )
+
+        if write_planes:
+            plane_writer.write(wrangler, cam, now)
 
 # =============================================================================
 
@@ -705,10 +698,22 @@ class AOVGroup(object):
 
         return d
 
-    def writeToIfd(self, wrangler, cam, now):
+    def writeToIfd(self, wrangler, cam, now, light_cache=None,
+                   plane_writer=None):
         """Write all AOVs in the group to the ifd."""
+        if light_cache is None:
+            light_cache = LightExportCache()
+
+        write_planes = plane_writer is None
+
+        if write_planes:
+            plane_writer = PlaneWriter()
+
         for aov in self.aovs:
-            aov.writeToIfd(wrangler, cam, now)
+            aov.writeToIfd(wrangler, cam, now, light_cache, plane_writer)
+
+        if write_planes:
+            plane_writer.write(wrangler, cam, now)
 
 # =============================================================================
 
@@ -722,6 +727,264 @@ class IntrinsicAOVGroup(AOVGroup):
         self.comment = "Automatically generated"
 
 # =============================================================================
+
+
+class LightExportCache(object):
+    """Cache of lights and their export settings.
+
+    The light lists for each scope and selection, and the export parameters
+    of each light, are only evaluated once so they can be shared by all the
+    AOVs written to an IFD.
+
+    """
+
+    def __init__(self):
+        # Tuples of _LightInfo objects, keyed by (scope, select, time).
+        self._lists = {}
+
+        # _LightInfo objects, keyed by (light name, time).
+        self._lights = {}
+
+    def __repr__(self):
+        return "<LightExportCache ({} lights)>".format(len(self._lights))
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def clear(self):
+        """Clear all cached lights."""
+        self._lists.clear()
+        self._lights.clear()
+
+    def getLights(self, cam, now, scope, select):
+        """Get a tuple of information about the lights matching a scope and
+        selection.
+
+        """
+        key = (scope, select, now)
+
+        lights = self._lists.get(key)
+
+        if lights is None:
+            lights = []
+
+            for light in cam.objectList("objlist:light", now, scope, select):
+                name = light.getName()
+
+                info = self._lights.get((name, now))
+
+                if info is None:
+                    info = _LightInfo(light, name, now)
+
+                    self._lights[(name, now)] = info
+
+                lights.append(info)
+
+            lights = tuple(lights)
+
+            self._lists[key] = lights
+
+        return lights
+
+# =============================================================================
+
+
+class PlaneWriter(object):
+    """Collect image plane definitions and write them to the IFD together.
+
+    Planes are written in the order they were added.  Planes with the same
+    file, channel and settings as an earlier plane are dropped, and planes
+    which use the file and channel of an earlier plane with different
+    settings are reported and skipped since Mantra can't write both.  Planes
+    written to separate files may use the same channel.
+
+    """
+
+    def __init__(self):
+        # Plane data dictionaries, keyed by (plane file, channel name).
+        self._planes = OrderedDict()
+
+        # The number of identical planes which have been dropped.
+        self._duplicates = 0
+
+        # (channel, variable) tuples of planes which were skipped.
+        self._collisions = []
+
+    def __len__(self):
+        return len(self._planes)
+
+    def __repr__(self):
+        return "<PlaneWriter ({} planes)>".format(len(self))
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def collisions(self):
+        """List of (channel, variable) tuples of planes which were skipped
+        because their channel was already used in the same file.
+
+        """
+        return self._collisions
+
+    @property
+    def duplicates(self):
+        """The number of identical planes which were dropped."""
+        return self._duplicates
+
+    @property
+    def planes(self):
+        """A tuple of the plane data dictionaries to write."""
+        return tuple(self._planes.itervalues())
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def addPlane(self, data):
+        """Add a plane definition.
+
+        Returns True if the plane will be written.
+
+        """
+        channel = data["channel"]
+
+        # Planes written to their own files don't share channel names with
+        # the main image.
+        key = (data.get("planefile"), channel)
+
+        existing = self._planes.get(key)
+
+        if existing is not None:
+            if existing == data:
+                self._duplicates += 1
+
+            else:
+                self._collisions.append((channel, data["variable"]))
+
+            return False
+
+        # The data is reused while building planes so store a copy.
+        self._planes[key] = dict(data)
+
+        return True
+
+    def clear(self):
+        """Remove all planes."""
+        self._planes.clear()
+        self._duplicates = 0
+        self._collisions = []
+
+    def write(self, wrangler, cam, now):
+        """Write all the planes to the IFD and clear them."""
+        import IFDapi
+        import soho
+
+        for channel, variable in self.collisions:
+            soho.warning(
+                "Skipping plane {} ({}): channel is already in use".format(
+                    channel,
+                    variable
+                )
+            )
+
+        if self.duplicates:
+            IFDapi.ray_comment(
+                "Skipped {} duplicate planes".format(self.duplicates)
+            )
+
+        for data in self._planes.itervalues():
+            AOV.writeDataToIfd(data, wrangler, cam, now)
+
+        self.clear()
+
+# =============================================================================
+
+
+class _LightInfo(object):
+    """Light export settings for a light, evaluated on demand."""
+
+    def __init__(self, light, name, now):
+        self._light = light
+        self._name = name
+        self._now = now
+
+        self._categories = _UNSET
+        self._prefix = _UNSET
+        self._suffix = _UNSET
+
+    def __repr__(self):
+        return "<_LightInfo {}>".format(self.name)
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def categories(self):
+        """List of categories the light belongs to.
+
+        This is None if the light doesn't have a 'categories' parameter.
+
+        """
+        if self._categories is _UNSET:
+            categories = []
+            self._light.evalString("categories", self._now, categories)
+
+            if categories:
+                # Since the categories value can be space or comma separated
+                # we replace the commas with spaces then split.
+                categories = categories[0].replace(',', ' ').split()
+
+            else:
+                categories = None
+
+            self._categories = categories
+
+        return self._categories
+
+    @property
+    def name(self):
+        """The full path of the light."""
+        return self._name
+
+    @property
+    def prefix(self):
+        """The export channel prefix, or None."""
+        if self._prefix is _UNSET:
+            prefix = []
+
+            # Look for the prefix parameter.  If it doesn't exist, use the
+            # light's name and replace the '/' with '_'.  The default value
+            # of 'vm_export_prefix' is usually $OS.
+            found = self._light.evalString(
+                "vm_export_prefix",
+                self._now,
+                prefix
+            )
+
+            if not found:
+                prefix = [self.name[1:].replace('/', '_')]
+
+            self._prefix = prefix[0] if prefix else None
+
+        return self._prefix
+
+    @property
+    def suffix(self):
+        """The export channel suffix."""
+        if self._suffix is _UNSET:
+            # Try and find the suffix using the 'vm_export_suffix' parameter.
+            # If it doesn't exist, use an empty string.
+            self._suffix = self._light.getDefaultedString(
+                "vm_export_suffix", self._now, ['']
+            )[0]
+
+        return self._suffix
+
+# =============================================================================
 # EXCEPTIONS
 # =============================================================================
 
@@ -774,6 +1037,10 @@ class MissingVexTypeError(AOVError):
 
 def _callPostDefPlane(data, wrangler, cam, now):
     """Call the post_defplane hook."""
+    # Skip building the arguments when there is nothing to call.
+    if not getManager().hasHooks("post_defplane"):
+        return False
+
     import IFDhooks
 
     return IFDhooks.call(
@@ -791,6 +1058,10 @@ def _callPostDefPlane(data, wrangler, cam, now):
 
 def _callPreDefPlane(data, wrangler, cam, now):
     """Call the pre_defplane hook."""
+    # Skip building the arguments when there is nothing to call.
+    if not getManager().hasHooks("pre_defplane"):
+        return False
+
     import IFDhooks
 
     return IFDhooks.call(
@@ -805,3 +1076,57 @@ def _callPreDefPlane(data, wrangler, cam, now):
         data.get("lightexport")
     )
 
+
+def _writeDataToIfd(data, wrangler, cam, now):
+    """Write AOV data to the ifd."""
+    import IFDapi
+
+    # Call the 'pre_defplane' hook.  If the function returns True,
+    # return.
+    if _callPreDefPlane(data, wrangler, cam, now):
+        return
+
+    # Start of plane block in IFD.
+    IFDapi.ray_start("plane")
+
+    # Primary block information.
+    IFDapi.ray_property("plane", "variable", [data["variable"]])
+    IFDapi.ray_property("plane", "vextype", [data["vextype"]])
+    IFDapi.ray_property("plane", "channel", [data["channel"]])
+
+    if "quantize" in data:
+        IFDapi.ray_property("plane", "quantize", [data["quantize"]])
+
+    # Optional AOV information.
+    if "planefile" in data:
+        planefile = data["planefile"]
+
+        if planefile is not None:
+            IFDapi.ray_property("plane", "planefile", [planefile])
+
+    if "lightexport" in data:
+        IFDapi.ray_property("plane", "lightexport", [data["lightexport"]])
+
+    if "pfilter" in data:
+        IFDapi.ray_property("plane", "pfilter", [data["pfilter"]])
+
+    if "sfilter" in data:
+        IFDapi.ray_property("plane", "sfilter", [data["sfilter"]])
+
+    if "component" in data:
+        IFDapi.ray_property("plane", "component", [data["component"]])
+
+    if "exclude_from_dcm" in data:
+        IFDapi.ray_property("plane", "excludedcm", [True])
+
+    # Call the 'post_defplane' hook.
+    if _callPostDefPlane(data, wrangler, cam, now):
+        return
+
+    # End the plane definition block.
+    IFDapi.ray_end()
+
+# =============================================================================
+
+# Marker for light settings which have not been evaluated yet.
+_UNSET = object()
@@ -13,8 +13,10 @@ import json
 import os
 
 # Houdini Toolbox Imports
-from ht.sohohooks.aovs.aov import AOV, AOVGroup, IntrinsicAOVGroup
+from ht.sohohooks.aovs.aov import AOV, AOVGroup, IntrinsicAOVGroup, \
+    LightExportCache, PlaneWriter
 from ht.utils import convertFromUnicode
+from ht.utils.paths import clearPathCache, findDirectories
 
 # Houdini Imports
 import hou
@@ -31,6 +33,13 @@ class AOVManager(object):
         self._groups = {}
         self._interface = None
 
+        # Incremented whenever the definitions change.
+        self._version = 0
+
+        # (items, flattened AOVs) tuples for parsed AOV strings, keyed by
+        # (string, version).
+        self._parsed = {}
+
         self._initFromFiles()
 
     # =========================================================================
@@ -67,6 +76,40 @@ class AOVManager(object):
                 # Add this AOV to the group.
                 group.aovs.append(aov)
 
+        self._definitionsChanged()
+
+    def _definitionsChanged(self):
+        """Invalidate any results based on the current definitions."""
+        self._version += 1
+
+        self._parsed.clear()
+
+    def _getParsedString(self, aov_str):
+        """Get the (items, flattened AOVs) tuple for a string."""
+        key = (aov_str, self._version)
+
+        parsed = self._parsed.get(key)
+
+        if parsed is None:
+            items = []
+
+            for name in aov_str.replace(',', ' ').split():
+                if name.startswith('@'):
+                    name = name[1:]
+
+                    if name in self.groups:
+                        items.append(self.groups[name])
+
+                else:
+                    if name in self._aovs:
+                        items.append(self._aovs[name])
+
+            parsed = (tuple(items), tuple(flattenedList(items)))
+
+            self._parsed[key] = parsed
+
+        return parsed
+
     def _initFromFiles(self):
         """Initialize the manager from files on disk."""
         file_paths = _findAOVFiles()
@@ -85,6 +128,8 @@ class AOVManager(object):
             if include in self.aovs:
                 group.aovs.append(self.aovs[include])
 
+        self._definitionsChanged()
+
     def _mergeReaders(self, readers):
         """Merge the data of multiple AOVFile objects."""
         # We need to handle AOVs first since AOVs in other files may overwrite
@@ -136,6 +181,11 @@ class AOVManager(object):
         """Dictionary containing all available AOVs."""
         return self._aovs
 
+    @property
+    def version(self):
+        """A number which changes whenever the definitions change."""
+        return self._version
+
     @property
     def groups(self):
         """Dictionary containing all available AOVGroups."""
@@ -181,18 +231,29 @@ class AOVManager(object):
             # Construct a manager-laf
             manager = findOrCreateSessionAOVManager()
 
-            # Parse the string to get any aovs/groups.
-            aovs = manager.getAOVsFromString(aov_str)
+            # Parse the string to get all the aovs, including those in
+            # groups.
+            aovs = manager.getFlattenedAOVsFromString(aov_str)
+
+            # Lights and their export settings are shared by all the AOVs.
+            light_cache = LightExportCache()
 
-            # Write any found items to the ifd.
+            # Collect the planes of all the AOVs so duplicates and channel
+            # collisions can be found before anything is written.
+            plane_writer = PlaneWriter()
+
+            # Add any found items.
             for aov in aovs:
-                aov.writeToIfd(wrangler, cam, now)
+                aov.writeToIfd(wrangler, cam, now, light_cache, plane_writer)
+
+            # Write the planes to the ifd.
+            plane_writer.write(wrangler, cam, now)
 
             # If we are generating the "Op_Id" plane we will need to tell SOHO
             # to generate these properties when outputting object.  Look for
             # the "Op_Id" variable being exported and if so enable operator id
             # generation
-            for aov in flattenedList(aovs):
+            for aov in aovs:
                 if aov.variable == "Op_Id":
                     IFDapi.ray_comment("Forcing object id generation")
                     IFDsettings._GenerateOpId = True
@@ -207,6 +268,8 @@ class AOVManager(object):
         """Add an AOV to the manager."""
         self._aovs[aov.variable] = aov
 
+        self._definitionsChanged()
+
         if self.interface is not None:
             self.interface.aovAddedSignal.emit(aov)
 
@@ -214,6 +277,8 @@ class AOVManager(object):
         """Add an AOVGroup to the manager."""
         self.groups[group.name] = group
 
+        self._definitionsChanged()
+
         if self.interface is not None:
             self.interface.groupAddedSignal.emit(group)
 
@@ -222,24 +287,25 @@ class AOVManager(object):
         self._aovs = {}
         self._groups = {}
 
+        self._definitionsChanged()
+
     def getAOVsFromString(self, aov_str):
-        """Get a list of AOVs and AOVGroups from a string."""
-        aovs = []
+        """Get a list of AOVs and AOVGroups from a string.
 
-        aov_str = aov_str.replace(',', ' ')
+        Parsed strings are cached until the definitions change.
 
-        for name in aov_str.split():
-            if name.startswith('@'):
-                name = name[1:]
+        """
+        return list(self._getParsedString(aov_str)[0])
 
-                if name in self.groups:
-                    aovs.append(self.groups[name])
+    def getFlattenedAOVsFromString(self, aov_str):
+        """Get a list of all the AOVs in a string, including the members of
+        any groups.
 
-            else:
-                if name in self._aovs:
-                    aovs.append(self._aovs[name])
+        Each AOV is only included once.  Parsed strings are cached until the
+        definitions change.
 
-        return aovs
+        """
+        return list(self._getParsedString(aov_str)[1])
 
     def initInterface(self):
         """Initialize an AOVViewerInterface for this manager."""
@@ -256,6 +322,10 @@ class AOVManager(object):
     def reload(self):
         """Reload all definitions."""
         self.clear()
+
+        # Look for any new files.
+        clearPathCache()
+
         self._initFromFiles()
 
     def removeAOV(self, aov):
@@ -263,6 +333,8 @@ class AOVManager(object):
         if aov.variable in self.aovs:
             self.aovs.pop(aov.variable)
 
+            self._definitionsChanged()
+
             if self.interface is not None:
                 self.interface.aovRemovedSignal.emit(aov)
 
@@ -271,9 +343,20 @@ class AOVManager(object):
         if group.name in self.groups:
             self.groups.pop(group.name)
 
+            self._definitionsChanged()
+
             if self.interface is not None:
                 self.interface.groupRemovedSignal.emit(group)
 
+    def updateGroup(self, group):
+        """Update the manager after a group was edited in place.
+
+        This must be called after changing the members of a group so any
+        cached results based on the old members are discarded.
+
+        """
+        self._definitionsChanged()
+
 # =============================================================================
 
 class AOVFile(object):
@@ -475,14 +558,7 @@ def _findAOVFiles():
 
 def _findHoudiniPathAOVFolders():
     """Look for any config/aovs folders in the HOUDINI_PATH."""
-    # Try to find HOUDINI_PATH directories.
-    try:
-        directories = hou.findDirectories("config/aovs")
-
-    except hou.OperationFailed:
-        directories = ()
-
-    return directories
+    return findDirectories("config/aovs")
 
 # =============================================================================
 # FUNCTIONS
@@ -528,15 +604,26 @@ def findOrCreateSessionAOVManager(rebuild=False):
 
 
 def flattenedList(items):
-    """Flatten a list that contains AOVs and groups into a list of all AOVs."""
+    """Flatten a list that contains AOVs and groups into a list of all AOVs.
+
+    Groups are flattened recursively and each AOV is only included once, in
+    the position it is first found.
+
+    """
     aovs = []
+    seen = set()
+
+    def flatten(items):
+        """Add the AOVs of a list of items."""
+        for item in items:
+            if isinstance(item, AOVGroup):
+                flatten(item.aovs)
 
-    for item in items:
-        if isinstance(item, AOVGroup):
-            aovs.extend(item.aovs)
+            elif item not in seen:
+                seen.add(item)
+                aovs.append(item)
 
-        else:
-            aovs.append(item)
+    flatten(items)
 
     return aovs
 
@@ -1,12 +1,35 @@
-"""This module provides functionality for manager soho hooks."""
+"""This module provides functionality for manager soho hooks.
+
+The manager can be configured using environment variables:
+
+    HT_SOHO_HOOK_TIMING         If set to 1, record the time taken by each
+                                hook function.
+    HT_SOHO_HOOK_TRACEBACKS     If set to 0, only write the error message
+                                rather than the full traceback to the IFD when
+                                a hook fails.
+    HT_IFD_PROFILE              If set to 1, or the path of a JSON file,
+                                profile IFD generation.  0 disables
+                                profiling.
+
+IFD generation can also be profiled using the enable_ifd_profile and
+ifd_profile_file ROP parameters.  When profiling, the time taken by each
+hook function and by writing each AOV is recorded, and a summary is written
+to the IFD as comments, and optionally as JSON, at the end of the render.
+
+"""
 
 # =============================================================================
 # IMPORTS
 # =============================================================================
 
 # Standard Library Imports
+import json
+import os
 import traceback
 
+# Houdini Toolbox Imports
+import ht.utils
+
 # =============================================================================
 # CLASSES
 # =============================================================================
@@ -17,42 +40,134 @@ class SohoHookManager(object):
     def __init__(self):
         self._hooks = {}
 
+        # Tuples of functions to call, keyed by hook name.  These are built
+        # when a hook is first called and rebuilt when hooks change.
+        self._chains = {}
+
+        self._format_tracebacks = \
+            os.environ.get("HT_SOHO_HOOK_TRACEBACKS") != "0"
+
+        # Timing information for hook calls, if timing is enabled.
+        self._timing = None
+
+        # The path to write profile JSON data to.
+        self._profile_path = None
+
+        timing, profile_path = _getEnvironmentProfile()
+
+        if timing:
+            self.enableTiming()
+
+        self.profile_path = profile_path
+
     def __repr__(self):
         return "<SohoHookManager ({} hooks)>".format(len(self.hooks))
 
+    # =========================================================================
+    # NON-PUBLIC METHODS
+    # =========================================================================
+
+    def _buildChain(self, name):
+        """Build the tuple of functions to call for a hook name."""
+        chain = []
+
+        for hook in self.hooks.get(name, ()):
+            # Record the time taken by each call, except for the profiling
+            # hooks themselves.
+            if self.timing is not None and hook not in _PROFILE_HOOKS:
+                hook = self.timing.timeFunction(
+                    ("hook", name, getattr(hook, "__name__", repr(hook))),
+                    hook
+                )
+
+            chain.append(hook)
+
+        self._chains[name] = tuple(chain)
+
+        return self._chains[name]
+
+    def _getChain(self, name):
+        """Get the tuple of functions to call for a hook name."""
+        try:
+            return self._chains[name]
+
+        except KeyError:
+            return self._buildChain(name)
+
+    def _writeError(self, name, error):
+        """Write information about an exception raised by a hook to the IFD.
+
+        """
+        from IFDapi import ray_comment
+
+        ray_comment(
+            "Hook Error[{}]: {}".format(name, str(error))
+        )
+
+        if self.format_tracebacks:
+            ray_comment(
+                "Traceback:\n# {}\n".format(
+                        "\n#".join(traceback.format_exc().split('\n'))
+                )
+            )
+
     # =========================================================================
     # PROPERTIES
     # =========================================================================
 
+    @property
+    def format_tracebacks(self):
+        """Whether to write full tracebacks to the IFD when a hook fails."""
+        return self._format_tracebacks
+
+    @format_tracebacks.setter
+    def format_tracebacks(self, format_tracebacks):
+        self._format_tracebacks = format_tracebacks
+
     @property
     def hooks(self):
         """Dictionary of hook functions grouped by hook name."""
         return self._hooks
 
+    @property
+    def profile_path(self):
+        """The path to write profile JSON data to, or None."""
+        return self._profile_path
+
+    @profile_path.setter
+    def profile_path(self, profile_path):
+        self._profile_path = profile_path
+
+    @property
+    def timing(self):
+        """Timing information for IFD generation.
+
+        Hook calls are keyed by ("hook", hook name, function name) and
+        writing AOVs by ("aov", variable) or ("aov", variable, light export).
+
+        This is None if timing is not enabled.
+
+        """
+        return self._timing
+
     # =========================================================================
     # METHODS
     # =========================================================================
 
     def callHook(self, name, *args, **kwargs):
         """Call all hook functions for a given soho hook name."""
-        from IFDapi import ray_comment
+        chain = self._getChain(name)
 
-        hooks = self.hooks.get(name, ())
+        # Most hooks have nothing registered so return as soon as possible.
+        if not chain:
+            return False
 
-        for hook in hooks:
+        for hook in chain:
             try:
                 result = hook(*args, **kwargs)
 
             except Exception as e:
-                ray_comment(
-                    "Hook Error[{}]: {}".format(name, str(e))
-                )
-
-                ray_comment(
-                    "Traceback:\n# {}\n".format(
-                            "\n#".join(traceback.format_exc().split('\n'))
-                    )
-                )
+                self._writeError(name, e)
 
             else:
                 if result:
@@ -60,12 +175,145 @@ class SohoHookManager(object):
 
         return False
 
+    def disableTiming(self):
+        """Stop recording hook call times."""
+        if self._timing is not None:
+            self._timing = None
+
+            self._chains.clear()
+
+    def enableTiming(self):
+        """Record the time taken by each hook function call."""
+        if self._timing is None:
+            self._timing = ht.utils.TimingStats()
+
+            self._chains.clear()
+
+    def hasHooks(self, name):
+        """Check if any hook functions are registered for a soho hook name."""
+        return bool(self._getChain(name))
+
     def registerHook(self, name, hook):
         """Register a hook function for a given soho hook name."""
         hooks = self.hooks.setdefault(name, [])
 
         hooks.append(hook)
 
+        # The chain for this hook needs to be rebuilt.
+        self._chains.pop(name, None)
+
+    def writeProfile(self):
+        """Write out and clear any recorded timings.
+
+        The summary is written to the IFD as comments and, if there is a
+        profile path, to a JSON file.
+
+        """
+        from IFDapi import ray_comment
+
+        if not self.timing or not self.timing.stats:
+            return
+
+        ray_comment("IFD generation profile:")
+
+        for line in self.timing.formatSummary():
+            ray_comment("    {}".format(line))
+
+        if self.profile_path is not None:
+            with open(self.profile_path, "w") as handle:
+                json.dump(
+                    self.timing.toList(("type", "name", "detail")),
+                    handle,
+                    indent=4
+                )
+
+            ray_comment("Wrote IFD profile to {}".format(self.profile_path))
+
+        # Each render is profiled separately.
+        self.timing.clear()
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
+# =============================================================================
+
+def _enableProfileFromParms(wrangler, cam, now):
+    """Enable profiling if the enable_ifd_profile ROP parameter is set.
+
+    If it is not set, profiling is only left on if it was enabled by the
+    environment.  Renders without a profile file parameter use the file
+    set by the environment, if any.
+
+    """
+    import soho
+
+    parms = {
+        "enable": soho.SohoParm(
+            "enable_ifd_profile",
+            "int",
+            [0],
+            skipdefault=False
+        ),
+        "path": soho.SohoParm(
+            "ifd_profile_file",
+            "str",
+            [""],
+            skipdefault=False
+        ),
+    }
+
+    plist = cam.wrangle(wrangler, parms, now)
+
+    timing, profile_path = _getEnvironmentProfile()
+
+    if plist and plist["enable_ifd_profile"].Value[0]:
+        timing = True
+
+        path = plist["ifd_profile_file"].Value[0]
+
+        if path:
+            profile_path = path
+
+    # Reset the settings of any previous render so they are not carried
+    # over.
+    if timing:
+        _HOOK_MANAGER.enableTiming()
+
+    else:
+        _HOOK_MANAGER.disableTiming()
+
+    _HOOK_MANAGER.profile_path = profile_path
+
+    return False
+
+
+def _getEnvironmentProfile():
+    """Get the profiling settings from the environment.
+
+    Returns a tuple of whether timing is enabled and the path to write
+    profile data to, or None.
+
+    """
+    profile = os.environ.get("HT_IFD_PROFILE", "")
+
+    # Empty and 0 values disable profiling.
+    if profile in ("", "0"):
+        profile = None
+
+    timing = profile is not None or \
+        os.environ.get("HT_SOHO_HOOK_TIMING") == "1"
+
+    if profile is not None and profile != "1":
+        return timing, profile
+
+    return timing, None
+
+
+def _writeProfile(*args, **kwargs):
+    """Write any recorded timings at the end of the render."""
+    _HOOK_MANAGER.writeProfile()
+
+    return False
+
 # =============================================================================
 # FUNCTIONS
 # =============================================================================
@@ -78,3 +326,8 @@ def getManager():
 
 _HOOK_MANAGER = SohoHookManager()
 
+# Hooks to enable profiling and write the results.
+_PROFILE_HOOKS = (_enableProfileFromParms, _writeProfile)
+
+_HOOK_MANAGER.registerHook("pre_cameraDisplay", _enableProfileFromParms)
+_HOOK_MANAGER.registerHook("pre_ifdEndRender", _writeProfile)
@@ -1155,6 +1155,9 @@ class EditGroupDialog(_BaseGroupDialog):
         aov_file.replaceGroup(group)
         aov_file.writeToFile()
 
+        # The group members have changed.
+        manager.MANAGER.updateGroup(group)
+
         self.groupUpdatedSignal.emit(group)
 
         return super(EditGroupDialog, self).accept()
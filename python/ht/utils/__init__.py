@@ -0,0 +1,240 @@
+"""This module contains utility functions for the ht package."""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Standard Library Imports
+import contextlib
+from functools import wraps
+import time
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+
+class TimingStats(object):
+    """Accumulate call counts and wall clock times for keyed operations.
+
+    Keys can be any hashable value, typically a tuple of names such as
+    (operation, stage).
+
+    """
+
+    def __init__(self):
+        self._stats = {}
+
+    def __repr__(self):
+        return "<TimingStats ({} entries)>".format(len(self.stats))
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def stats(self):
+        """Dictionary of keys to [call count, total time, max time] lists."""
+        return self._stats
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def addTime(self, key, duration):
+        """Record a call for a key that took duration seconds."""
+        entry = self.stats.get(key)
+
+        if entry is None:
+            self.stats[key] = [1, duration, duration]
+
+        else:
+            entry[0] += 1
+            entry[1] += duration
+
+            if duration > entry[2]:
+                entry[2] = duration
+
+    def clear(self):
+        """Clear all recorded times."""
+        self.stats.clear()
+
+    def formatSummary(self):
+        """Get a list of lines summarizing the recorded times, slowest
+        first.
+
+        """
+        lines = []
+
+        for key, (count, total, max_time) in self.sortedItems():
+            if isinstance(key, tuple):
+                key = ".".join(str(part) for part in key)
+
+            lines.append(
+                "{}: {} calls, {:.6f}s total, {:.6f}s max".format(
+                    key,
+                    count,
+                    total,
+                    max_time
+                )
+            )
+
+        return lines
+
+    def sortedItems(self):
+        """Get a list of (key, [count, total, max]) items, slowest first."""
+        return sorted(
+            self.stats.iteritems(),
+            key=lambda item: item[1][1],
+            reverse=True
+        )
+
+    def timeFunction(self, key, func):
+        """Wrap a function so that calls to it are recorded under a key."""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.time()
+
+            try:
+                return func(*args, **kwargs)
+
+            finally:
+                self.addTime(key, time.time() - start)
+
+        return wrapper
+
+    def toList(self, key_names):
+        """Get a list of dictionaries of the recorded times, suitable for
+        writing as JSON.
+
+        key_names is a list of names to use for the parts of each key.
+
+        """
+        result = []
+
+        for key, (count, total, max_time) in self.sortedItems():
+            if not isinstance(key, tuple):
+                key = (key,)
+
+            entry = dict(zip(key_names, key))
+
+            entry.update(
+                {
+                    "calls": count,
+                    "total": total,
+                    "max": max_time,
+                }
+            )
+
+            result.append(entry)
+
+        return result
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
+# =============================================================================
+
+def _convertUnicodeValue(value):
+    """Convert a unicode value, or the members of a list, to strings."""
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+
+    if isinstance(value, list):
+        return [_convertUnicodeValue(element) for element in value]
+
+    return value
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+
+def convertFromUnicode(data):
+    """Convert any unicode members to normal strings."""
+    # If the data is a dictionary we need to convert the key/value pairs
+    # and return a new dictionary.
+    if isinstance(data, dict):
+        return {convertFromUnicode(key): convertFromUnicode(value)
+                for key, value in data.iteritems()}
+
+        # Python 2.6 compatible workaround for no dictionary comprehensions.
+#        return dict(
+#            [
+#                (convertFromUnicode(key), convertFromUnicode(value))
+#                 for key, value in data.iteritems()
+#            ]
+#        )
+
+    # Convert any elements in a list.
+    elif isinstance(data, list):
+        return [convertFromUnicode(element) for element in data]
+
+    # The data is a unicode string, so encode it to a regular one.
+    elif isinstance(data, unicode):
+        return data.encode('utf-8')
+
+    # Return the untouched data.
+    return data
+
+
+def convertUnicodeObject(data):
+    """Convert the unicode keys and values of a JSON object to strings.
+
+    This is intended to be used as a json object_hook.  Objects are passed
+    to the hook as they are decoded, innermost first, so unlike
+    convertFromUnicode() nested dictionaries are not converted again.
+
+    """
+    return {
+        _convertUnicodeValue(key): _convertUnicodeValue(value)
+        for key, value in data.iteritems()
+    }
+
+
+@contextlib.contextmanager
+def timer(label=None):
+    """Context manager for outputting timing information.
+
+>>> with ht.utils.timer("sleeping"):
+...     time.sleep(2)
+...
+sleeping - 2.00206804276
+
+    """
+    # Start time.
+    t = time.time()
+
+    try:
+        yield
+
+    finally:
+        duration = time.time() - t
+
+        if label is not None:
+            print "{} - {}".format(label, duration)
+        else:
+            print duration
+
+
+@contextlib.contextmanager
+def updateMode(update_mode):
+    """Context manager for setting the interface's update mode.
+
+    update_mode should be one of hou.updateMode
+
+    """
+    import hou
+
+    # Get the current update mode so it can be restored.
+    current = hou.updateModeSetting()
+
+    # Set the desired mode.
+    hou.ui.setUpdateMode(update_mode)
+
+    try:
+        yield
+
+    finally:
+        # Restore the update mode.
+        hou.ui.setUpdateMode(current)
+
@@ -0,0 +1,267 @@
+"""This module contains functions for finding files and directories in the
+Houdini path.
+
+These are replacements for hou.findFile(), hou.findFiles() and
+hou.findDirectories() which cache their results for the life of the process
+so each path is only searched for once.  They also work without the hou
+module, in which case the HOUDINI_PATH environment variable is searched.
+
+Results can optionally be stored in a persistent index file shared between
+processes by setting the HT_PATH_INDEX environment variable to the path of
+the file.  The index is only used if the Houdini path and the modification
+times of its directories are the same as when it was written.  Since only
+the top level directories are checked, files added to existing
+subdirectories are not noticed until a top level directory changes or the
+index is removed, so it is best suited to deployed, read-only paths.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Standard Library Imports
+import json
+import os
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+class HoudiniPathCache(object):
+    """Cache of paths found in the Houdini path.
+
+    """
+
+    def __init__(self, index_path=None):
+        self._index_path = index_path
+
+        # The directories being searched.
+        self._search_path = None
+
+        # Lists of (path, is directory) entries, keyed by relative path.
+        self._entries = None
+
+    def __repr__(self):
+        return "<HoudiniPathCache ({} entries)>".format(
+            len(self._entries) if self._entries is not None else 0
+        )
+
+    # =========================================================================
+    # NON-PUBLIC METHODS
+    # =========================================================================
+
+    def _getEntries(self, relative_path):
+        """Get the (path, is directory) entries for a relative path."""
+        if self._entries is None:
+            self._initialize()
+
+        entries = self._entries.get(relative_path)
+
+        if entries is None:
+            entries = []
+
+            for directory in self._search_path:
+                path = os.path.join(directory, relative_path)
+
+                if os.path.isdir(path):
+                    entries.append((path, True))
+
+                elif os.path.exists(path):
+                    entries.append((path, False))
+
+            self._entries[relative_path] = entries
+
+            if self.index_path is not None:
+                self._writeIndex()
+
+        return entries
+
+    def _getModificationTimes(self):
+        """Get the modification times of the search path directories."""
+        mtimes = []
+
+        for directory in self._search_path:
+            try:
+                mtimes.append(os.path.getmtime(directory))
+
+            except OSError:
+                mtimes.append(None)
+
+        return mtimes
+
+    def _initialize(self):
+        """Determine the search path and load any valid index."""
+        self._search_path = _getSearchPath()
+        self._entries = {}
+
+        if self.index_path is None:
+            return
+
+        try:
+            with open(self.index_path) as handle:
+                data = json.load(handle)
+
+        # Missing or unreadable indexes are rebuilt.
+        except (IOError, ValueError):
+            return
+
+        if data.get("search_path") != list(self._search_path):
+            return
+
+        if data.get("mtimes") != self._getModificationTimes():
+            return
+
+        for relative_path, entries in data.get("entries", {}).iteritems():
+            self._entries[str(relative_path)] = [
+                (str(path), is_dir) for path, is_dir in entries
+            ]
+
+    def _writeIndex(self):
+        """Write the current entries to the index file.
+
+        Failures are ignored since the index is only an optimization.
+
+        """
+        data = {
+            "search_path": list(self._search_path),
+            "mtimes": self._getModificationTimes(),
+            "entries": self._entries,
+        }
+
+        temp_path = "{}.{}".format(self.index_path, os.getpid())
+
+        try:
+            with open(temp_path, "w") as handle:
+                json.dump(data, handle)
+
+            # Rename so other processes never read a partial index.
+            os.rename(temp_path, self.index_path)
+
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def index_path(self):
+        """The path of the persistent index file, or None."""
+        return self._index_path
+
+    @property
+    def search_path(self):
+        """A tuple of the directories being searched."""
+        if self._search_path is None:
+            self._initialize()
+
+        return self._search_path
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def clear(self):
+        """Clear all cached results.
+
+        The search path will be determined again on the next lookup.
+
+        """
+        self._search_path = None
+        self._entries = None
+
+    def findDirectories(self, relative_path):
+        """Find all directories matching a relative path.
+
+        Returns a tuple of paths in search order.
+
+        """
+        return tuple(
+            path for path, is_dir in self._getEntries(relative_path)
+            if is_dir
+        )
+
+    def findFile(self, relative_path):
+        """Find the first file matching a relative path.
+
+        Returns None if there is no matching file.
+
+        """
+        for path, is_dir in self._getEntries(relative_path):
+            if not is_dir:
+                return path
+
+        return None
+
+    def findFiles(self, relative_path):
+        """Find all files matching a relative path.
+
+        Returns a tuple of paths in search order.
+
+        """
+        return tuple(
+            path for path, is_dir in self._getEntries(relative_path)
+            if not is_dir
+        )
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
+# =============================================================================
+
+def _getSearchPath():
+    """Get a tuple of the directories in the Houdini path."""
+    try:
+        import hou
+
+    except ImportError:
+        pass
+
+    else:
+        return tuple(hou.houdiniPath())
+
+    directories = []
+
+    for directory in os.environ.get("HOUDINI_PATH", "").split(os.pathsep):
+        # Skip the '&' marker for the default path.
+        if not directory or directory == "&":
+            continue
+
+        directory = os.path.expandvars(os.path.expanduser(directory))
+
+        if directory not in directories:
+            directories.append(directory)
+
+    return tuple(directories)
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def clearPathCache():
+    """Clear all cached results for the process."""
+    _PATH_CACHE.clear()
+
+
+def findDirectories(relative_path):
+    """Find all directories in the Houdini path matching a relative path."""
+    return _PATH_CACHE.findDirectories(relative_path)
+
+
+def findFile(relative_path):
+    """Find the first file in the Houdini path matching a relative path.
+
+    Returns None if there is no matching file.
+
+    """
+    return _PATH_CACHE.findFile(relative_path)
+
+
+def findFiles(relative_path):
+    """Find all files in the Houdini path matching a relative path."""
+    return _PATH_CACHE.findFiles(relative_path)
+
+# =============================================================================
+
+_PATH_CACHE = HoudiniPathCache(os.environ.get("HT_PATH_INDEX") or None)
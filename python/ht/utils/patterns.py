@@ -0,0 +1,283 @@
+"""This module contains functions and classes for matching names against
+Houdini style patterns.
+
+Patterns are space separated lists of globs which support '*', '?' and
+'[...]' wildcards.  Globs prefixed with '^' remove matches, and globs are
+applied from left to right, so '* ^foo*' matches everything not starting with
+'foo'.  This is the same behaviour as hou.patternMatch() but patterns are
+compiled to regular expressions once and cached so repeated matching is cheap
+and does not require the hou module.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Standard Library Imports
+from collections import OrderedDict
+import re
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+class HoudiniPattern(object):
+    """A compiled Houdini style pattern."""
+
+    def __init__(self, pattern):
+        self._pattern = pattern
+
+        # List of (exclude, compiled regex) tuples for each glob.
+        self._globs = []
+
+        for glob in pattern.split():
+            exclude = glob.startswith("^")
+
+            if exclude:
+                glob = glob[1:]
+
+            self._globs.append((exclude, re.compile(_globToRegex(glob))))
+
+        # If none of the globs are exclusions the pattern can be matched with
+        # a single regular expression.
+        self._combined = None
+
+        if self._globs and not any(exclude for exclude, _ in self._globs):
+            self._combined = re.compile(
+                "|".join(
+                    "(?:{})".format(regex.pattern)
+                    for _, regex in self._globs
+                )
+            )
+
+    def __repr__(self):
+        return "<HoudiniPattern '{}'>".format(self.pattern)
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def pattern(self):
+        """The source pattern string."""
+        return self._pattern
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def matches(self, name):
+        """Check if a name matches the pattern."""
+        if self._combined is not None:
+            return self._combined.match(name) is not None
+
+        result = False
+
+        for exclude, regex in self._globs:
+            if regex.match(name) is not None:
+                result = not exclude
+
+        return result
+
+# =============================================================================
+
+class LRUCache(object):
+    """A dictionary-like cache which holds a limited number of the most
+    recently used entries.
+
+    """
+
+    def __init__(self, max_size=1024):
+        self._data = OrderedDict()
+        self._max_size = max_size
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return "<LRUCache ({}/{})>".format(len(self), self.max_size)
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def max_size(self):
+        """The maximum number of entries to hold."""
+        return self._max_size
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def clear(self):
+        """Remove all entries."""
+        self._data.clear()
+
+    def get(self, key, default=None):
+        """Get the value for a key, marking it as recently used."""
+        try:
+            value = self._data.pop(key)
+
+        except KeyError:
+            return default
+
+        self._data[key] = value
+
+        return value
+
+    def set(self, key, value):
+        """Set the value for a key, discarding the least recently used entry
+        if the cache is full.
+
+        """
+        self._data.pop(key, None)
+
+        if len(self._data) >= self.max_size:
+            self._data.popitem(last=False)
+
+        self._data[key] = value
+
+# =============================================================================
+
+class PatternMatcher(object):
+    """Match names against a list of rule patterns.
+
+    The results for recently matched names are cached so repeatedly matching
+    the same names does not need to match any patterns.
+
+    """
+
+    def __init__(self, patterns, cache_size=1024):
+        self._patterns = tuple(compilePattern(pattern) for pattern in patterns)
+
+        self._cache = LRUCache(cache_size)
+
+    def __repr__(self):
+        return "<PatternMatcher ({} patterns)>".format(len(self.patterns))
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def patterns(self):
+        """A tuple of the compiled rule patterns."""
+        return self._patterns
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def firstMatch(self, name):
+        """Get the index of the first pattern that matches a name, or None if
+        no patterns match.
+
+        """
+        indexes = self.matchingIndexes(name)
+
+        if indexes:
+            return indexes[0]
+
+        return None
+
+    def matchingIndexes(self, name):
+        """Get a tuple of the indexes of all the patterns which match a
+        name.
+
+        """
+        indexes = self._cache.get(name)
+
+        if indexes is None:
+            indexes = tuple(
+                index for index, pattern in enumerate(self.patterns)
+                if pattern.matches(name)
+            )
+
+            self._cache.set(name, indexes)
+
+        return indexes
+
+# =============================================================================
+# NON-PUBLIC FUNCTIONS
+# =============================================================================
+
+def _globToRegex(glob):
+    """Convert a glob to a regular expression string."""
+    parts = []
+
+    index = 0
+    length = len(glob)
+
+    while index < length:
+        char = glob[index]
+        index += 1
+
+        if char == "*":
+            parts.append(".*")
+
+        elif char == "?":
+            parts.append(".")
+
+        elif char == "[":
+            end = glob.find("]", index)
+
+            # No closing bracket so treat it literally.
+            if end == -1:
+                parts.append(re.escape(char))
+
+            else:
+                contents = glob[index:end].replace("\\", "\\\\")
+
+                # Support both [!...] and [^...] for negation.
+                if contents.startswith("!"):
+                    contents = "^" + contents[1:]
+
+                parts.append("[{}]".format(contents))
+
+                index = end + 1
+
+        else:
+            parts.append(re.escape(char))
+
+    parts.append(r"\Z")
+
+    return "".join(parts)
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def compilePattern(pattern):
+    """Get a compiled HoudiniPattern for a pattern string.
+
+    Compiled patterns are cached so compiling the same pattern again is
+    cheap.
+
+    """
+    compiled = _PATTERN_CACHE.get(pattern)
+
+    if compiled is None:
+        compiled = HoudiniPattern(pattern)
+
+        _PATTERN_CACHE.set(pattern, compiled)
+
+    return compiled
+
+
+def patternMatch(pattern, name):
+    """Check if a name matches a pattern.
+
+    This is a replacement for hou.patternMatch() which uses cached compiled
+    patterns.
+
+    """
+    return compilePattern(pattern).matches(name)
+
+# =============================================================================
+
+_PATTERN_CACHE = LRUCache(4096)
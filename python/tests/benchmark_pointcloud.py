@@ -0,0 +1,249 @@
+#!/usr/bin/python
+"""This script benchmarks the ht.geometry.pointcloud module.
+
+It uses stand-in geometry objects from fakegeo.py so it can be executed with
+regular Python without a Houdini license.  For each cloud size it measures
+the time taken to build the cloud, the throughput of radius and nearest point
+queries and the cost of converting query results to points.
+
+Results can be saved as baselines and later runs compared against them, with
+any measurement that is slower than its baseline by more than the tolerance
+reported as a regression:
+
+    python benchmark_pointcloud.py --save
+    python benchmark_pointcloud.py --tolerance 0.2
+
+"""
+
+# Standard Library Imports
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+# Python Imports
+import numpy
+
+import fakegeo
+
+fakegeo.installFakeHou()
+
+# Houdini Toolbox Imports
+from ht.geometry.pointcloud import PointCloud
+
+# The default file to store baselines in.
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "benchmark_pointcloud.json"
+)
+
+# The average number of points a radius query should find.
+NEIGHBOURS = 32
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def _timeCall(func, repeat=3):
+    """Get the best time of several calls to a function."""
+    best = None
+
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        duration = time.time() - start
+
+        if best is None or duration < best:
+            best = duration
+
+    return best
+
+
+def _timeQueries(func, positions):
+    """Get the average time of a query function over a list of positions."""
+    def runQueries():
+        for position in positions:
+            func(position)
+
+    return _timeCall(runQueries) / len(positions)
+
+
+def benchmarkCloud(num_points, num_queries=1000, compact=False):
+    """Benchmark a cloud of a certain size.
+
+    Returns a dictionary of measurement names to times in seconds.  Query
+    measurements are the time per query.
+
+    """
+    geometry = fakegeo.buildRandomGeometry(num_points)
+
+    state = numpy.random.RandomState(1)
+    positions = [tuple(row) for row in state.random_sample((num_queries, 3))]
+
+    # A radius which should find about NEIGHBOURS points in a unit cube.
+    radius = math.pow(3.0 * NEIGHBOURS / (4.0 * math.pi * num_points), 1 / 3.0)
+
+    results = {}
+
+    results["build"] = _timeCall(
+        lambda: PointCloud(geometry, compact=compact)
+    )
+
+    cloud = PointCloud(geometry, compact=compact)
+
+    # Time the searches by themselves.
+    results["radius_query"] = _timeQueries(
+        lambda position: cloud._searchRadius(position, radius),
+        positions
+    )
+
+    results["knn_query"] = _timeQueries(
+        lambda position: cloud._searchNearest(position, NEIGHBOURS),
+        positions
+    )
+
+    # Time converting found point numbers to points.
+    found = [cloud._searchRadius(position, radius)[0].tolist()
+             for position in positions]
+
+    results["conversion"] = _timeCall(
+        lambda: [cloud._getResultPoints(numbers) for numbers in found]
+    ) / len(found)
+
+    # Time the full public queries.
+    results["find_all_close_points"] = _timeQueries(
+        lambda position: cloud.findAllClosePoints(position, radius),
+        positions
+    )
+
+    results["find_nearest_points"] = _timeQueries(
+        lambda position: cloud.findNearestPoints(position, NEIGHBOURS),
+        positions
+    )
+
+    return results
+
+
+def compareResults(results, baselines, tolerance):
+    """Compare results against baselines.
+
+    Returns a list of (key, name, time, baseline) tuples for any
+    measurements which are slower than their baseline by more than the
+    tolerance.
+
+    """
+    regressions = []
+
+    for key, measurements in sorted(results.iteritems()):
+        baseline = baselines.get(key)
+
+        if baseline is None:
+            continue
+
+        for name, duration in sorted(measurements.iteritems()):
+            if name not in baseline:
+                continue
+
+            if duration > baseline[name] * (1 + tolerance):
+                regressions.append((key, name, duration, baseline[name]))
+
+    return regressions
+
+
+def printResults(results):
+    """Print a table of results."""
+    for key, measurements in sorted(results.iteritems()):
+        print key
+
+        for name, duration in sorted(measurements.iteritems()):
+            if name == "build":
+                print "    {:<24} {:>12.4f} s".format(name, duration)
+
+            else:
+                print "    {:<24} {:>12.0f} /s".format(name, 1.0 / duration)
+
+
+def main():
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[10000, 100000, 1000000],
+        help="Cloud sizes to benchmark."
+    )
+
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=1000,
+        help="Number of queries to time for each size."
+    )
+
+    parser.add_argument(
+        "--baselines",
+        default=BASELINE_PATH,
+        help="File to save and compare baselines."
+    )
+
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Save the results as the new baselines."
+    )
+
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Fraction a measurement can be slower than its baseline."
+    )
+
+    args = parser.parse_args()
+
+    results = {}
+
+    for num_points in args.sizes:
+        for compact in (False, True):
+            key = "{}{}".format(num_points, " compact" if compact else "")
+
+            results[key] = benchmarkCloud(num_points, args.queries, compact)
+
+    printResults(results)
+
+    if args.save:
+        with open(args.baselines, "w") as handle:
+            json.dump(results, handle, indent=4, sort_keys=True)
+
+        print "Saved baselines to {}".format(args.baselines)
+
+        return 0
+
+    if not os.path.isfile(args.baselines):
+        print "No baselines found at {}".format(args.baselines)
+
+        return 0
+
+    with open(args.baselines) as handle:
+        baselines = json.load(handle)
+
+    regressions = compareResults(results, baselines, args.tolerance)
+
+    for key, name, duration, baseline in regressions:
+        print "REGRESSION {} {}: {:.6f} (baseline {:.6f})".format(
+            key,
+            name,
+            duration,
+            baseline
+        )
+
+    return 1 if regressions else 0
+
+# =============================================================================
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""This module contains stand-ins for Houdini geometry objects.
+
+They supply point positions and attributes from numpy arrays so that code
+which queries geometry can be tested and benchmarked without a Houdini
+license.
+
+"""
+
+# =============================================================================
+# IMPORTS
+# =============================================================================
+
+# Standard Library Imports
+import sys
+import types
+
+# Python Imports
+import numpy
+
+# =============================================================================
+# CLASSES
+# =============================================================================
+
+class FakeOperationFailed(Exception):
+    """Stand-in for hou.OperationFailed."""
+    pass
+
+
+class FakeAttribData(object):
+    """Stand-in for the hou.attribData enumeration."""
+    Float = "Float"
+    Int = "Int"
+    String = "String"
+
+
+class FakeAttrib(object):
+    """Stand-in for hou.Attrib."""
+
+    def __init__(self, name, data_type, size):
+        self._name = name
+        self._data_type = data_type
+        self._size = size
+
+    def dataType(self):
+        return self._data_type
+
+    def name(self):
+        return self._name
+
+    def size(self):
+        return self._size
+
+
+class FakePoint(object):
+    """Stand-in for hou.Point."""
+
+    def __init__(self, geometry, number):
+        self._geometry = geometry
+        self._number = number
+
+    def __repr__(self):
+        return "<FakePoint #{}>".format(self._number)
+
+    def number(self):
+        return self._number
+
+    def position(self):
+        return tuple(self._geometry.positions[self._number].tolist())
+
+
+class FakePointSequence(object):
+    """Lazy sequence of FakePoints, matching the result of
+    hou.Geometry.iterPoints().
+
+    """
+
+    def __init__(self, geometry):
+        self._geometry = geometry
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        return FakePoint(self._geometry, index)
+
+    def __len__(self):
+        return len(self._geometry.positions)
+
+
+class FakeSopNode(object):
+    """Stand-in for hou.SopNode."""
+
+    def __init__(self, path):
+        self._path = path
+
+    def path(self):
+        return self._path
+
+
+class FakeGeometry(object):
+    """Stand-in for hou.Geometry backed by numpy arrays.
+
+    positions is an (N, 3) array of point positions and attribs is an
+    optional dictionary of extra point attribute names to arrays with one
+    row per point.
+
+    """
+
+    def __init__(self, positions, attribs=None):
+        positions = numpy.asarray(positions, dtype=numpy.float32)
+
+        self._attribs = {"P": positions.reshape((-1, 3))}
+
+        if attribs is not None:
+            for name, values in attribs.iteritems():
+                values = numpy.asarray(values)
+
+                if values.ndim == 1:
+                    values = values.reshape((-1, 1))
+
+                self._attribs[name] = values
+
+    # =========================================================================
+    # PROPERTIES
+    # =========================================================================
+
+    @property
+    def positions(self):
+        """The (N, 3) array of point positions."""
+        return self._attribs["P"]
+
+    # =========================================================================
+    # METHODS
+    # =========================================================================
+
+    def findPointAttrib(self, name):
+        values = self._attribs.get(name)
+
+        if values is None:
+            return None
+
+        # Use whichever hou module is installed so comparisons against
+        # hou.attribData values work.
+        import hou
+
+        if values.dtype.kind == "f":
+            data_type = hou.attribData.Float
+
+        elif values.dtype.kind in "iu":
+            data_type = hou.attribData.Int
+
+        else:
+            data_type = hou.attribData.String
+
+        return FakeAttrib(name, data_type, values.shape[1])
+
+    def globPoints(self, pattern):
+        """Glob points from a pattern of space separated point numbers or
+        '*'.
+
+        """
+        num_points = len(self.positions)
+
+        if pattern.strip() == "*":
+            return tuple(
+                FakePoint(self, number) for number in xrange(num_points)
+            )
+
+        try:
+            numbers = sorted(set(int(token) for token in pattern.split()))
+
+        except ValueError:
+            raise FakeOperationFailed("Invalid pattern: {}".format(pattern))
+
+        if not numbers or numbers[-1] >= num_points:
+            raise FakeOperationFailed("Invalid pattern: {}".format(pattern))
+
+        return tuple(FakePoint(self, number) for number in numbers)
+
+    def iterPoints(self):
+        return FakePointSequence(self)
+
+    def pointFloatAttribValues(self, name):
+        return tuple(self._attribs[name].ravel().tolist())
+
+    def pointFloatAttribValuesAsString(self, name):
+        return self._attribs[name].astype(numpy.float32).tostring()
+
+    def pointIntAttribValues(self, name):
+        return tuple(self._attribs[name].ravel().tolist())
+
+    def pointIntAttribValuesAsString(self, name):
+        return self._attribs[name].astype(numpy.int32).tostring()
+
+    def pointStringAttribValues(self, name):
+        return tuple(self._attribs[name].ravel().tolist())
+
+    def sopNode(self):
+        return FakeSopNode("/obj/fake/geo")
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def buildRandomGeometry(num_points, seed=0):
+    """Build a FakeGeometry of uniformly distributed points in a unit cube.
+
+    The geometry has a float 'Cd' attribute and an int 'id' attribute.
+
+    """
+    state = numpy.random.RandomState(seed)
+
+    return FakeGeometry(
+        state.random_sample((num_points, 3)),
+        {
+            "Cd": state.random_sample((num_points, 3)).astype(numpy.float32),
+            "id": numpy.arange(num_points, dtype=numpy.int32),
+        }
+    )
+
+
+def installFakeHou():
+    """Make 'import hou' work when Houdini is not available.
+
+    If the real hou module can be imported it is returned, otherwise a
+    stand-in module providing the names used by the geometry code is
+    installed.
+
+    """
+    try:
+        import hou
+
+    except ImportError:
+        hou = types.ModuleType("hou")
+
+        hou.OperationFailed = FakeOperationFailed
+        hou.Point = FakePoint
+        hou.attribData = FakeAttribData
+
+        sys.modules["hou"] = hou
+
+    return hou
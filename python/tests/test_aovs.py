@@ -0,0 +1,141 @@
+#!/usr/bin/python
+"""This script is a unit test suite for the PlaneWriter class in the
+ht.sohohooks.aovs.aov module.
+
+It uses stand-in Houdini modules so it can be executed with regular Python.
+
+"""
+
+# Standard Library Imports
+import sys
+import types
+import unittest
+
+# Stand-in modules which record the warnings and comments written.
+_MESSAGES = []
+
+hou = types.ModuleType("hou")
+hou.session = types.ModuleType("hou.session")
+hou.houdiniPath = lambda: []
+
+IFDapi = types.ModuleType("IFDapi")
+IFDapi.ray_comment = lambda message: _MESSAGES.append(("comment", message))
+
+soho = types.ModuleType("soho")
+soho.warning = lambda message: _MESSAGES.append(("warning", message))
+
+sys.modules.update({"hou": hou, "IFDapi": IFDapi, "soho": soho})
+
+# Houdini Toolbox Imports
+from ht.sohohooks.aovs import aov
+from ht.sohohooks.aovs.aov import PlaneWriter
+
+
+def buildData(variable, channel=None, planefile=None, **kwargs):
+    """Build a plane data dictionary."""
+    data = {
+        "variable": variable,
+        "vextype": "vector",
+        "channel": channel or variable,
+        "planefile": planefile,
+    }
+
+    data.update(kwargs)
+
+    return data
+
+
+class TestPlaneWriter(unittest.TestCase):
+    """This class implements test cases for the PlaneWriter class."""
+
+    def setUp(self):
+        del _MESSAGES[:]
+
+        self.written = []
+
+        self._writeDataToIfd = aov._writeDataToIfd
+        aov._writeDataToIfd = lambda data, *args: self.written.append(data)
+
+        self.writer = PlaneWriter()
+
+    def tearDown(self):
+        aov._writeDataToIfd = self._writeDataToIfd
+
+    def test_duplicate(self):
+        self.assertTrue(self.writer.addPlane(buildData("N")))
+        self.assertFalse(self.writer.addPlane(buildData("N")))
+
+        self.assertEqual(len(self.writer), 1)
+        self.assertEqual(self.writer.duplicates, 1)
+        self.assertEqual(self.writer.collisions, [])
+
+    def test_collision(self):
+        self.assertTrue(self.writer.addPlane(buildData("N")))
+        self.assertFalse(self.writer.addPlane(buildData("P", channel="N")))
+
+        self.assertEqual(self.writer.planes, (buildData("N"),))
+        self.assertEqual(self.writer.duplicates, 0)
+        self.assertEqual(self.writer.collisions, [("N", "P")])
+
+    def test_separate_files(self):
+        # Planes in separate files can use the same channel.
+        self.assertTrue(self.writer.addPlane(buildData("N")))
+        self.assertTrue(
+            self.writer.addPlane(
+                buildData("P", channel="N", planefile="$HIP/P.exr")
+            )
+        )
+
+        # The plane file is part of a duplicate.
+        self.assertFalse(
+            self.writer.addPlane(
+                buildData("P", channel="N", planefile="$HIP/P.exr")
+            )
+        )
+
+        self.assertEqual(len(self.writer), 2)
+        self.assertEqual(self.writer.duplicates, 1)
+        self.assertEqual(self.writer.collisions, [])
+
+    def test_copy(self):
+        data = buildData("N")
+
+        self.writer.addPlane(data)
+
+        # The data is reused by the caller so changes shouldn't be kept.
+        data["channel"] = "normal"
+
+        self.assertEqual(self.writer.planes[0]["channel"], "N")
+
+    def test_write(self):
+        self.writer.addPlane(buildData("N"))
+        self.writer.addPlane(buildData("N"))
+        self.writer.addPlane(buildData("P", channel="N"))
+        self.writer.addPlane(buildData("P"))
+
+        self.writer.write(None, None, 0)
+
+        self.assertEqual(
+            [data["variable"] for data in self.written],
+            ["N", "P"]
+        )
+
+        self.assertEqual(
+            _MESSAGES,
+            [
+                (
+                    "warning",
+                    "Skipping plane N (P): channel is already in use"
+                ),
+                ("comment", "Skipped 1 duplicate planes"),
+            ]
+        )
+
+        # Writing clears the planes.
+        self.assertEqual(len(self.writer), 0)
+        self.assertEqual(self.writer.duplicates, 0)
+        self.assertEqual(self.writer.collisions, [])
+
+if __name__ == '__main__':
+    # Run the tests.
+    unittest.main()
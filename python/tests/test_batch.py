@@ -0,0 +1,115 @@
+#!/usr/bin/python
+"""This script is a unit test suite for the ht.pyfilter.batch module.
+
+Files are filtered in the test process rather than a worker pool.  It can be
+executed with regular Python.
+
+"""
+
+# Standard Library Imports
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+# Find the shipped operations.json without Houdini.
+os.environ.setdefault("HOUDINI_PATH", os.path.join(_ROOT, "houdini"))
+os.environ.setdefault("HT_PYFILTER_LOG_LEVEL", "WARNING")
+
+# Houdini Toolbox Imports
+from ht.pyfilter import batch
+
+TEST_IFD = os.path.join(_ROOT, "python", "ht", "pyfilter", "test.ifd")
+
+
+class TestBatch(unittest.TestCase):
+    """This class implements test cases for batch filtering."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        self.output_path = os.path.join(self.directory, "out.ifd")
+        self.rules_file = os.path.join(self.directory, "properties.json")
+
+        self.writeRules(2)
+
+        self.args = ["-propertiesfile", self.rules_file]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def filterFile(self):
+        """Filter the test IFD, returning the result status."""
+        job = (TEST_IFD, self.output_path, self.args, False)
+
+        result = batch._filterJob(job)
+
+        self.assertIsNone(result.error)
+
+        return result.status
+
+    def writeRules(self, value):
+        """Write a rule file setting the shading quality of all objects."""
+        with open(self.rules_file, "w") as handle:
+            json.dump(
+                {"instance": {"object:shadingquality": {"value": value}}},
+                handle
+            )
+
+    def test_getRuleFiles(self):
+        self.assertEqual(
+            batch._getRuleFiles(
+                [
+                    "-propertiesfile", "a.json",
+                    "-deeppath", "deep.rat",
+                    "-geobudget=b.json",
+                ]
+            ),
+            ["a.json", "b.json"]
+        )
+
+    def test_isUpToDate(self):
+        self.assertFalse(
+            batch.isUpToDate(TEST_IFD, self.output_path, self.args)
+        )
+
+        self.assertEqual(self.filterFile(), "filtered")
+
+        self.assertTrue(
+            batch.isUpToDate(TEST_IFD, self.output_path, self.args)
+        )
+
+        self.assertEqual(self.filterFile(), "skipped")
+
+        # Different args.
+        self.assertFalse(
+            batch.isUpToDate(TEST_IFD, self.output_path, ["-zdepth"])
+        )
+
+    def test_rules_changed(self):
+        self.assertEqual(self.filterFile(), "filtered")
+
+        # Changing the rules invalidates the output even though its args
+        # and modification time are unchanged.
+        self.writeRules(3)
+
+        self.assertFalse(
+            batch.isUpToDate(TEST_IFD, self.output_path, self.args)
+        )
+
+        self.assertEqual(self.filterFile(), "filtered")
+
+        with open(self.output_path, "rb") as handle:
+            self.assertIn(
+                "        ray_property object shadingquality 3\n",
+                handle.readlines()
+            )
+
+if __name__ == '__main__':
+    # Run the tests.
+    unittest.main()
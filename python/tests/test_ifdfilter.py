@@ -0,0 +1,310 @@
+#!/usr/bin/python
+"""This script is a unit test suite for the ht.pyfilter.ifdfilter module.
+
+Each shipped PyFilter operation is run over the test IFD without Mantra.  It
+can be executed with regular Python.
+
+"""
+
+# Standard Library Imports
+from collections import Counter
+import json
+import os
+import shutil
+import StringIO
+import tempfile
+import unittest
+
+_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+# Find the shipped operations.json without Houdini.
+os.environ.setdefault("HOUDINI_PATH", os.path.join(_ROOT, "houdini"))
+os.environ.setdefault("HT_PYFILTER_LOG_LEVEL", "WARNING")
+
+# Houdini Toolbox Imports
+from ht.pyfilter.ifdfilter import IfdFilter, IfdPropertyState, filterIfd
+
+TEST_IFD = os.path.join(_ROOT, "python", "ht", "pyfilter", "test.ifd")
+
+# SetProperties data to change the shading quality of all objects.
+PROPERTIES = {"instance": {"object:shadingquality": {"value": 2}}}
+
+
+class TestIfdFilter(unittest.TestCase):
+    """This class implements test cases for filtering IFDs."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def filterTestIfd(self, args, input_path=TEST_IFD):
+        """Filter the test IFD, returning the filter and output lines."""
+        output_path = os.path.join(self.directory, "out.ifd")
+
+        ifd_filter = filterIfd(input_path, output_path, args)
+
+        with open(output_path, "rb") as handle:
+            lines = handle.readlines()
+
+        return ifd_filter, lines
+
+    def writeIpIfd(self):
+        """Write a copy of the test IFD where the beauty render, which
+        follows a shadow map render, is rendered to ip.
+
+        """
+        path = os.path.join(self.directory, "ip.ifd")
+
+        with open(TEST_IFD, "rb") as handle:
+            contents = handle.read()
+
+        with open(path, "wb") as handle:
+            handle.write(
+                contents.replace(
+                    'ray_image "/home/gthompson/Houdini-Toolbox/foo.exr"',
+                    'ray_image "ip"'
+                )
+            )
+
+        return path
+
+    def getAddedLines(self, lines):
+        """Get a Counter of the lines which are not in the test IFD."""
+        with open(TEST_IFD, "rb") as handle:
+            return Counter(lines) - Counter(handle.readlines())
+
+    def writeFile(self, name, data):
+        """Write data as JSON to a file in the temp directory."""
+        path = os.path.join(self.directory, name)
+
+        with open(path, "w") as handle:
+            json.dump(data, handle)
+
+        return path
+
+    def test_disableprimary(self):
+        ifd_filter, lines = self.filterTestIfd(["-disableprimary"])
+
+        self.assertEqual(len(ifd_filter.manager.operations), 1)
+        self.assertIn('    ray_image "null:"\n', lines)
+
+    def test_geobudget(self):
+        rules_file = self.writeFile(
+            "rules.json",
+            {
+                "rules": [
+                    {
+                        "pattern": "/obj/box",
+                        "rendersubd": False,
+                        "max_displacebound": 0.1,
+                        "shadingquality_scale": 0.5,
+                    }
+                ]
+            }
+        )
+
+        ifd_filter, lines = self.filterTestIfd(["-geobudget", rules_file])
+
+        operation = ifd_filter.manager.operations[0]
+
+        # Only the shading quality of /obj/box is above the caps.
+        self.assertEqual(operation.rules_file, rules_file)
+        self.assertIn(
+            "        ray_property object shadingquality 0.5\n",
+            lines
+        )
+        self.assertNotIn("rendersubd", "".join(lines))
+        self.assertNotIn("displacebound", "".join(lines))
+
+    def test_geobudget_increase(self):
+        rules_file = self.writeFile(
+            "rules.json",
+            {"rules": [{"pattern": "*", "shadingquality_scale": 2}]}
+        )
+
+        ifd_filter, lines = self.filterTestIfd(["-geobudget", rules_file])
+
+        # Scales above 1 would not reduce detail so are ignored.
+        self.assertEqual(self.getAddedLines(lines), Counter())
+        self.assertEqual(ifd_filter.manager.operations[0].reduced, {})
+
+    def test_ipoverrides(self):
+        ifd_filter, lines = self.filterTestIfd(
+            ["-ip_override", "-ip_resscale", "0.5", "-ip_samplescale", "0.5"],
+            self.writeIpIfd()
+        )
+
+        self.assertEqual(len(ifd_filter.manager.operations), 1)
+
+        # Only the beauty render goes to ip.
+        self.assertEqual(
+            [line for line in lines if line.startswith("ray_property")],
+            [
+                "ray_property image samples 3 3\n",
+                "ray_property image resolution 320 240\n",
+            ]
+        )
+
+    def test_multiple_renders(self):
+        ifd_filter, lines = self.filterTestIfd(
+            ["-ip_override", "-ip_resscale", "0.5"],
+            self.writeIpIfd()
+        )
+
+        # Whether the overrides apply is decided for each render.
+        self.assertEqual(
+            [line for line in lines if "resolution" in line],
+            [
+                "    ray_property image resolution 1024 1024\n",
+                "    ray_property image resolution 640 480\n",
+                "ray_property image resolution 320 240\n",
+            ]
+        )
+
+    def test_keepplanes(self):
+        ifd_filter, lines = self.filterTestIfd(["-keepplanes", "N"])
+
+        self.assertEqual(len(ifd_filter.manager.operations), 1)
+        self.assertIn("\t    ray_property plane disable 1\n", lines)
+
+    def test_properties(self):
+        ifd_filter, lines = self.filterTestIfd(
+            [
+                "-properties",
+                json.dumps(PROPERTIES)
+            ]
+        )
+
+        self.assertEqual(len(ifd_filter.manager.operations), 1)
+        self.assertIn("        ray_property object shadingquality 2\n", lines)
+
+    def test_propertiesfile(self):
+        properties_file = self.writeFile(
+            "properties.json",
+            PROPERTIES
+        )
+
+        ifd_filter, lines = self.filterTestIfd(
+            ["-propertiesfile", properties_file]
+        )
+
+        self.assertEqual(len(ifd_filter.manager.operations), 1)
+        self.assertIn("        ray_property object shadingquality 2\n", lines)
+
+    def test_deeppath(self):
+        ifd_filter, lines = self.filterTestIfd(["-deeppath", "/tmp/deep.rat"])
+
+        self.assertEqual(len(ifd_filter.manager.operations), 1)
+
+        # Only the beauty render's deep resolver is changed.
+        self.assertEqual(
+            self.getAddedLines(lines),
+            Counter(
+                [
+                    'ray_property image deepresolver "shadow" "filename" '
+                    '"/tmp/deep.rat"\n'
+                ]
+            )
+        )
+
+    def test_tilecallback(self):
+        ifd_filter, lines = self.filterTestIfd(
+            ["-tilecallback", "/path/to/callback.py"]
+        )
+
+        self.assertEqual(len(ifd_filter.manager.operations), 1)
+
+        # The callback is set for each render.
+        self.assertEqual(
+            self.getAddedLines(lines),
+            Counter(
+                {
+                    'ray_property renderer tilecallback '
+                    '"/path/to/callback.py"\n': 2
+                }
+            )
+        )
+
+    def test_zdepth(self):
+        ifd_filter, lines = self.filterTestIfd(["-zdepth"])
+
+        self.assertEqual(len(ifd_filter.manager.operations), 1)
+
+        # The Of plane of the shadow render is disabled and all 8 objects
+        # are given a constant shader.
+        expected = Counter(["\t    ray_property plane disable 1\n"])
+
+        for line in (
+                "        ray_property object overridedetail 1\n",
+                '        ray_property object surface "opdef:/Shop/v_constant" '
+                '"clr" "0" "0" "0"\n',
+                "        ray_property object displace\n"):
+            expected[line] = 8
+
+        self.assertEqual(self.getAddedLines(lines), expected)
+
+    def test_geometry_block_end(self):
+        ifd_filter = IfdFilter(
+            args=[
+                "-properties",
+                json.dumps(PROPERTIES)
+            ]
+        )
+
+        # Geometry data containing ray_end or commands should not end the
+        # block or be processed.
+        geometry = [
+            "ray_start geo\t# {\n",
+            "    ray_detail /obj/geo stdin\n",
+            "[\"name\",\"my_ray_end\",\n",
+            "ray_start object\n",
+            "ray_end ]\n",
+            "]]ray_end\t# }\n",
+        ]
+
+        instance = [
+            "ray_start object\t# {\n",
+            "    ray_property object name \"/obj/geo\"\n",
+        ]
+
+        destination = StringIO.StringIO()
+
+        ifd_filter.filterStream(
+            geometry + instance + ["ray_end\t# }\n"],
+            destination
+        )
+
+        self.assertEqual(
+            destination.getvalue(),
+            "".join(
+                geometry + instance + [
+                    "    ray_property object shadingquality 2\n",
+                    "ray_end\t# }\n",
+                ]
+            )
+        )
+
+    def test_property_defaults(self):
+        state = IfdPropertyState()
+
+        self.assertEqual(state.property("object:rendersubd"), [0])
+        self.assertEqual(state.property("image:samples"), [3, 3])
+        self.assertEqual(state.property("not:declared"), [])
+
+        state.beginBlock()
+        state.loadValues("plane:variable", ["N"])
+
+        # Planes are named after the variable if there is no channel.
+        self.assertEqual(state.property("plane:channel"), ["N"])
+
+        state.loadValues("plane:channel", ["normal"])
+
+        self.assertEqual(state.property("plane:channel"), ["normal"])
+
+if __name__ == '__main__':
+    # Run the tests.
+    unittest.main()
@@ -0,0 +1,228 @@
+#!/usr/bin/python
+"""This script is a unit test suite for adaptive scaling in the
+ht.pyfilter.operations.ipoverrides module.
+
+It uses a stand-in mantra module and a simulated clock so it can be executed
+with regular Python.  Renders are simulated as taking a fixed amount of time
+plus a sampling time proportional to the pixel samples actually rendered.
+
+"""
+
+# Standard Library Imports
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+os.environ.setdefault("HT_PYFILTER_LOG_LEVEL", "WARNING")
+
+# Houdini Toolbox Imports
+from ht.pyfilter.operations import ipoverrides
+from ht.pyfilter.operations.ipoverrides import IpOverrides, \
+    computeAdaptiveScales, fitRenderCost
+
+RESOLUTION = [1920, 1080]
+SAMPLES = [6, 6]
+
+class FakeClock(object):
+    """Stand-in for the time module."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+def installFakeMantra(properties):
+    """Install a mantra module which reads and writes a dictionary."""
+    module = types.ModuleType("mantra")
+
+    module.property = lambda name: list(properties.get(name, []))
+
+    def setproperty(name, value):
+        if not isinstance(value, list):
+            value = [value]
+
+        properties[name] = value
+
+    module.setproperty = setproperty
+
+    sys.modules["mantra"] = module
+
+
+def getWork(properties):
+    """Get the fraction of the full pixel samples being rendered."""
+    width, height = properties["image:resolution"]
+    sx, sy = properties["image:samples"]
+
+    return float(width * height * sx * sy) / \
+        (RESOLUTION[0] * RESOLUTION[1] * SAMPLES[0] * SAMPLES[1])
+
+
+class TestAdaptiveScales(unittest.TestCase):
+    """This class implements test cases for adaptive ip scaling."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.profile_file = os.path.join(self.directory, "profiles.json")
+
+        self.clock = FakeClock()
+        self._time = ipoverrides.time
+        ipoverrides.time = self.clock
+
+        self.properties = {}
+        installFakeMantra(self.properties)
+
+    def tearDown(self):
+        ipoverrides.time = self._time
+
+        shutil.rmtree(self.directory)
+
+    def createOperation(self, args):
+        """Create an IpOverrides operation for a list of args."""
+        parser = argparse.ArgumentParser()
+        IpOverrides.registerParserArgs(parser)
+
+        operation = IpOverrides(None)
+        operation.processParsedArgs(parser.parse_args(args))
+
+        return operation
+
+    def render(self, target, fixed, cost, operation=None):
+        """Simulate an ip render, returning the time it took."""
+        self.properties.clear()
+        self.properties.update(
+            {
+                "image:filename": ["ip"],
+                "image:resolution": list(RESOLUTION),
+                "image:samples": list(SAMPLES),
+                "plane:variable": ["N"],
+                "renderer:renderlabel": ["/obj/cam.beauty"],
+                "renderer:rendertype": ["beauty"],
+            }
+        )
+
+        if operation is None:
+            operation = self.createOperation(
+                [
+                    "-ip_adaptive", str(target),
+                    "-ip_profilefile", self.profile_file,
+                    "-ip_profilekey", "test",
+                ]
+            )
+
+        self.assertTrue(operation.shouldRun())
+
+        start = self.clock.now
+
+        operation.filterPlane()
+        operation.filterCamera()
+
+        self.clock.now += fixed + cost * getWork(self.properties)
+
+        operation.filterEndRender()
+
+        return self.clock.now - start
+
+    def test_computeAdaptiveScales(self):
+        self.assertEqual(computeAdaptiveScales(5, 100, 200), (1.0, 1.0))
+        self.assertEqual(computeAdaptiveScales(5, 100, 2), (0.1, 0.1))
+
+        res_scale, sample_scale = computeAdaptiveScales(5, 100, 30)
+
+        self.assertAlmostEqual(5 + 100 * (res_scale * sample_scale) ** 2, 30)
+
+    def test_fitRenderCost(self):
+        fixed, cost = fitRenderCost([[1.0, 105.0], [0.1, 15.0]])
+
+        self.assertAlmostEqual(fixed, 5)
+        self.assertAlmostEqual(cost, 100)
+
+        # A single timing can't be split so it is all sampling time.
+        self.assertEqual(fitRenderCost([[0.5, 50.0]]), (0.0, 100.0))
+
+    def test_converges(self):
+        durations = [self.render(20, 5, 100) for _ in range(6)]
+
+        for duration in durations[2:]:
+            self.assertAlmostEqual(duration, 20, delta=1)
+
+    def test_profile_key(self):
+        operation = self.createOperation(["-ip_adaptive", "10"])
+
+        hip_file = os.environ.get("HIPFILE")
+        os.environ["HIPFILE"] = "/path/to/scene.hip"
+
+        if hip_file is None:
+            self.addCleanup(os.environ.pop, "HIPFILE", None)
+
+        else:
+            self.addCleanup(os.environ.__setitem__, "HIPFILE", hip_file)
+
+        self.properties.update(
+            {
+                "renderer:renderlabel": ["/obj/cam.beauty"],
+                "renderer:rendertype": ["beauty"],
+            }
+        )
+
+        self.assertEqual(
+            operation._getProfileKey(),
+            "/path/to/scene.hip:/obj/cam:beauty"
+        )
+
+        # Labels which don't follow the soho convention are used whole.
+        self.properties["renderer:renderlabel"] = ["custom"]
+
+        self.assertEqual(
+            operation._getProfileKey(),
+            "/path/to/scene.hip:custom:beauty"
+        )
+
+    def test_reset(self):
+        operation = self.createOperation(
+            [
+                "-ip_adaptive", "2",
+                "-ip_profilefile", self.profile_file,
+                "-ip_profilekey", "test",
+                "-ip_resscale", "0.5",
+            ]
+        )
+
+        # Time a render then render with reduced scales.
+        self.render(2, 5, 100, operation)
+        self.render(2, 5, 100, operation)
+
+        self.assertLess(
+            self.properties["image:resolution"][0],
+            RESOLUTION[0] * 0.5
+        )
+
+        # The scales chosen for a render are not kept for the next.
+        self.assertEqual(operation.res_scale, 0.5)
+        self.assertIsNone(operation.sample_scale)
+        self.assertFalse(operation.disable_aovs)
+        self.assertIsNone(operation._target_work)
+
+    def test_unreachable_target(self):
+        # The fixed time alone is over the target so the lowest scales
+        # should be used without the estimate growing each render.
+        durations = [self.render(2, 5, 100) for _ in range(6)]
+
+        for duration in durations[3:]:
+            self.assertAlmostEqual(duration, durations[2], delta=0.1)
+
+        profile = ipoverrides._loadProfiles(self.profile_file)["test"]
+
+        self.assertAlmostEqual(profile["fixed"], 5, delta=0.5)
+        self.assertAlmostEqual(profile["cost"], 100, delta=5)
+
+        self.assertEqual(self.properties.get("plane:disable"), [1])
+
+if __name__ == '__main__':
+    # Run the tests.
+    unittest.main()
@@ -0,0 +1,258 @@
+#!/usr/bin/python
+"""This script is a unit test suite for the ht.geometry.pointcloud module.
+
+It uses stand-in geometry objects from fakegeo.py so it can be executed with
+regular Python without a Houdini license.  Query results are checked against
+brute force searches of the same positions.
+
+"""
+
+# Standard Library Imports
+import unittest
+
+# Python Imports
+import numpy
+
+import fakegeo
+
+fakegeo.installFakeHou()
+
+# Houdini Toolbox Imports
+from ht.geometry.pointcloud import PointCloud
+
+NUM_POINTS = 2000
+
+def bruteForceDistances(geometry, position):
+    """Get the distance from the position to every point."""
+    return numpy.sqrt(
+        ((geometry.positions - numpy.asarray(position)) ** 2).sum(axis=1)
+    )
+
+def getNumbers(points):
+    """Get the point numbers of a list of points."""
+    return sorted(point.number() for point in points)
+
+class TestPointCloud(unittest.TestCase):
+    """This class implements test cases for PointCloud queries."""
+
+    def setUp(self):
+        self.geometry = fakegeo.buildRandomGeometry(NUM_POINTS)
+        self.position = (0.5, 0.5, 0.5)
+        self.distances = bruteForceDistances(self.geometry, self.position)
+
+    def test_findAllClosePoints(self):
+        cloud = PointCloud(self.geometry)
+
+        result = getNumbers(cloud.findAllClosePoints(self.position, 0.2))
+
+        expected = numpy.where(self.distances <= 0.2)[0].tolist()
+
+        self.assertEqual(result, expected)
+
+    def test_findNearestPoints(self):
+        cloud = PointCloud(self.geometry)
+
+        result = getNumbers(cloud.findNearestPoints(self.position, 10))
+
+        expected = sorted(numpy.argsort(self.distances)[:10].tolist())
+
+        self.assertEqual(result, expected)
+
+    def test_findNearestPoints_maxdist(self):
+        cloud = PointCloud(self.geometry)
+
+        nearest = numpy.sort(self.distances)
+        maxdist = (nearest[4] + nearest[5]) / 2
+
+        result = cloud.findNearestPoints(self.position, 10, maxdist=maxdist)
+
+        self.assertEqual(len(result), 5)
+
+    def test_findNearestPoints_single(self):
+        cloud = PointCloud(self.geometry)
+
+        result = getNumbers(cloud.findNearestPoints(self.position))
+
+        self.assertEqual(result, [numpy.argmin(self.distances)])
+
+    def test_pattern(self):
+        pattern = " ".join(str(number) for number in range(0, NUM_POINTS, 3))
+
+        cloud = PointCloud(self.geometry, pattern=pattern)
+
+        result = getNumbers(cloud.findNearestPoints(self.position, 10))
+
+        distances = numpy.where(
+            numpy.arange(NUM_POINTS) % 3 == 0,
+            self.distances,
+            numpy.inf
+        )
+
+        expected = sorted(numpy.argsort(distances)[:10].tolist())
+
+        self.assertEqual(result, expected)
+
+    def test_mask(self):
+        cloud = PointCloud(self.geometry)
+
+        mask = numpy.arange(NUM_POINTS) % 2 == 1
+
+        result = getNumbers(
+            cloud.findNearestPoints(self.position, 10, mask=mask)
+        )
+
+        distances = numpy.where(mask, self.distances, numpy.inf)
+
+        expected = sorted(numpy.argsort(distances)[:10].tolist())
+
+        self.assertEqual(result, expected)
+
+    def test_mask_inserted(self):
+        cloud = PointCloud(self.geometry)
+
+        cloud.update(inserted={NUM_POINTS: self.position})
+
+        # The mask doesn't cover the inserted point.
+        mask = numpy.ones(NUM_POINTS, dtype=bool)
+
+        with self.assertRaises(ValueError):
+            cloud.findNearestPoints(self.position, 1, mask=mask)
+
+        with self.assertRaises(ValueError):
+            cloud.findAllClosePoints(self.position, 0.2, mask=mask)
+
+        mask = numpy.append(mask, True)
+
+        result = cloud.gatherAttributes(self.position, [], 0.2, mask=mask)
+
+        self.assertIn(NUM_POINTS, result["ptnum"].tolist())
+
+        # The mask size follows the point numbers after a rebuild.
+        cloud.rebuild()
+
+        with self.assertRaises(ValueError):
+            cloud.findNearestPoints(self.position, 1, mask=mask[:-1])
+
+    def test_update(self):
+        cloud = PointCloud(self.geometry, rebuild_threshold=0.5)
+
+        nearest = numpy.argsort(self.distances)
+
+        moved = int(nearest[0])
+        deleted = int(nearest[1])
+        far = int(nearest[-1])
+
+        rebuilt = cloud.update(
+            changed={moved: (5, 5, 5), far: self.position},
+            deleted=[deleted]
+        )
+
+        self.assertFalse(rebuilt)
+        self.assertEqual(cloud.num_elements, NUM_POINTS - 1)
+
+        result = getNumbers(cloud.findNearestPoints(self.position, 2))
+
+        self.assertEqual(result, sorted([far, int(nearest[2])]))
+
+        cloud.rebuild()
+
+        self.assertEqual(cloud.num_pending, 0)
+
+        result = getNumbers(cloud.findNearestPoints(self.position, 2))
+
+        self.assertEqual(result, sorted([far, int(nearest[2])]))
+
+    def test_update_rebuild(self):
+        cloud = PointCloud(self.geometry, rebuild_threshold=0.001)
+
+        rebuilt = cloud.update(deleted=range(10))
+
+        self.assertTrue(rebuilt)
+        self.assertEqual(cloud.num_pending, 0)
+        self.assertEqual(cloud.num_elements, NUM_POINTS - 10)
+
+    def test_gatherAttributes(self):
+        cloud = PointCloud(self.geometry)
+
+        result = cloud.gatherAttributes(self.position, ["id"], num_points=5)
+
+        expected = numpy.argsort(self.distances)[:5]
+
+        self.assertEqual(result["id"].ravel().tolist(), expected.tolist())
+
+    def test_filterAttributes(self):
+        cloud = PointCloud(self.geometry)
+
+        result = cloud.filterAttributes(
+            self.position,
+            ["Cd"],
+            0.2,
+            kernel="uniform"
+        )
+
+        colors = numpy.array(
+            self.geometry.pointFloatAttribValues("Cd")
+        ).reshape((-1, 3))
+
+        expected = colors[self.distances <= 0.2].mean(axis=0)
+
+        self.assertTrue(numpy.allclose(result["Cd"], expected))
+
+    def test_queryPairs(self):
+        geometry = fakegeo.buildRandomGeometry(200)
+        cloud = PointCloud(geometry)
+
+        result = set(tuple(pair) for pair in cloud.queryPairs(0.1).tolist())
+
+        expected = set()
+
+        for number in range(200):
+            distances = bruteForceDistances(
+                geometry,
+                geometry.positions[number]
+            )
+
+            for other in numpy.where(distances <= 0.1)[0]:
+                if number < other:
+                    expected.add((number, int(other)))
+
+        self.assertEqual(result, expected)
+
+    def test_crossQuery(self):
+        geometry = fakegeo.buildRandomGeometry(200)
+        other_geometry = fakegeo.buildRandomGeometry(100, seed=1)
+
+        cloud = PointCloud(geometry)
+        other_cloud = PointCloud(other_geometry)
+
+        result = cloud.crossQuery(other_cloud, 0.1)
+
+        expected = set()
+
+        for number in range(200):
+            distances = bruteForceDistances(
+                other_geometry,
+                geometry.positions[number]
+            )
+
+            for other in numpy.where(distances <= 0.1)[0]:
+                expected.add((number, int(other)))
+
+        result = set(tuple(pair) for pair in result.tolist())
+
+        self.assertEqual(result, expected)
+
+    def test_compact(self):
+        cloud = PointCloud(self.geometry)
+        compact = PointCloud(self.geometry, compact=True)
+
+        self.assertEqual(
+            getNumbers(cloud.findNearestPoints(self.position, 10)),
+            getNumbers(compact.findNearestPoints(self.position, 10))
+        )
+
+        self.assertTrue(compact.nbytes < cloud.nbytes)
+
+if __name__ == '__main__':
+    # Run the tests.
+    unittest.main()